@@ -0,0 +1,279 @@
+import argparse
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import timeit
+from contextlib import redirect_stdout
+from datetime import datetime
+
+import numpy as np
+import torch
+
+from simulation.car import Car
+from simulation.world import CollisionMap
+from ml.environment import CarEnvironment, VecCarEnvironment
+from ml.dqn_agent import DQNAgent
+from ml.replay_buffer import ReplayBuffer
+
+
+STATE_SIZE = 8
+ACTION_SIZE = 5
+
+
+def measure(fn, number, repeat, items=1):
+    """
+    Time a callable with timeit.
+
+    Args:
+        fn (callable): Function to time (no arguments)
+        number (int): Calls per timing run
+        repeat (int): Number of timing runs
+        items (int): Work items per call (e.g. cars per step), for throughput
+
+    Returns:
+        dict: Per-call best/mean time in microseconds and items per second
+    """
+    runs = timeit.Timer(fn).repeat(repeat=repeat, number=number)
+    per_call = [run / number for run in runs]
+    best = min(per_call)
+    return {
+        'best_us': best * 1e6,
+        'mean_us': sum(per_call) / len(per_call) * 1e6,
+        'per_sec': items / best if best > 0 else float('inf'),
+        'calls': number * repeat,
+    }
+
+
+def bench_cast_ray(map_path, number, repeat):
+    """CollisionMap.cast_ray over random free-space rays, per engine."""
+    results = {}
+    rng = np.random.default_rng(0)
+
+    for engine in ("sdf", "march"):
+        collision_map = CollisionMap(map_path, ray_engine=engine)
+        h, w = collision_map.shape
+        rays = []
+        while len(rays) < 256:
+            x, y = rng.uniform(0, w), rng.uniform(0, h)
+            if not collision_map.is_wall(x, y):
+                rays.append((x, y, rng.uniform(-math.pi, math.pi)))
+
+        def cast():
+            for x, y, angle in rays:
+                collision_map.cast_ray(x, y, angle)
+
+        result = measure(cast, max(1, number // 10), repeat, items=len(rays))
+        result['rays_per_call'] = len(rays)
+        results[engine] = result
+
+    return results
+
+
+def bench_car(map_path, number, repeat):
+    """Car.step and Car.isitinwall (corner and footprint tests) for one car."""
+    collision_map = CollisionMap(map_path)
+    car = Car(collision_map, math.pi / 2, 120, 120)
+    footprint_car = Car(collision_map, math.pi / 2, 120, 120, footprint=True)
+    footprint_car.isitinwall()  # build the heading's mask outside the timing
+
+    def step():
+        if not car.step(0.5, 0.1):
+            car.reset(math.pi / 2, 120, 120)
+
+    return {
+        'step': measure(step, number, repeat),
+        'isitinwall': measure(car.isitinwall, number, repeat),
+        'isitinwall_footprint': measure(footprint_car.isitinwall, number, repeat),
+    }
+
+
+def bench_environment(map_path, car_counts, number, repeat):
+    """CarEnvironment.step (per car) and VecCarEnvironment.step at several car counts."""
+    results = {}
+    rng = np.random.default_rng(0)
+
+    for num_cars in car_counts:
+        env = CarEnvironment(map_path, num_cars=num_cars)
+        env.reset()
+        actions = rng.integers(0, ACTION_SIZE, size=(1024, num_cars))
+        tick = [0]
+
+        def step_all():
+            row = actions[tick[0] % len(actions)]
+            tick[0] += 1
+            for car_idx in range(num_cars):
+                _, _, done, _ = env.step(car_idx, row[car_idx])
+                if done:
+                    env.reset(car_idx=car_idx)
+
+        vec_env = VecCarEnvironment(map_path, num_cars=num_cars)
+
+        def vec_step():
+            vec_env.step(actions[tick[0] % len(actions)])
+            tick[0] += 1
+
+        calls = max(1, number // num_cars)
+        results[str(num_cars)] = {
+            'CarEnvironment': measure(step_all, calls, repeat, items=num_cars),
+            'VecCarEnvironment': measure(vec_step, max(1, number // 10), repeat, items=num_cars),
+        }
+
+    return results
+
+
+def bench_replay(number, repeat, buffer_size=100000, batch_size=64):
+    """ReplayBuffer.add on a full buffer, ReplayBuffer.sample and ReplayBuffer.sample_batches."""
+    buffer = ReplayBuffer(buffer_size, batch_size, STATE_SIZE)
+    rng = np.random.default_rng(0)
+    states = rng.random((buffer_size, STATE_SIZE), dtype=np.float32)
+    buffer.add_batch(states, rng.integers(0, ACTION_SIZE, buffer_size),
+                     rng.random(buffer_size), states, np.zeros(buffer_size, dtype=bool))
+
+    state = states[0]
+
+    def add():
+        buffer.add(state, 1, 0.5, state, False)
+
+    return {
+        'add': measure(add, number, repeat),
+        'sample': measure(buffer.sample, number, repeat, items=batch_size),
+        'sample_batches_8': measure(lambda: buffer.sample_batches(8), max(1, number // 8), repeat,
+                                    items=8 * batch_size),
+    }
+
+
+def bench_agent(number, repeat, batch_size=64):
+    """DQNAgent.act, DQNAgent.act_batch and DQNAgent.learn on a filled buffer."""
+    agent = DQNAgent(STATE_SIZE, ACTION_SIZE, hidden_sizes=[128, 64], batch_size=batch_size)
+    rng = np.random.default_rng(0)
+    n = 10000
+    states = rng.random((n, STATE_SIZE), dtype=np.float32)
+    agent.memory.add_batch(states, rng.integers(0, ACTION_SIZE, n), rng.random(n),
+                           states, rng.random(n) < 0.05)
+
+    state = states[0]
+    batch = states[:64]
+
+    def learn():
+        agent.learn(agent.memory.sample())
+
+    return {
+        'act': measure(lambda: agent.act(state), number, repeat),
+        'act_batch_64': measure(lambda: agent.act_batch(batch), number, repeat, items=64),
+        'learn': measure(learn, max(1, number // 4), repeat, items=batch_size),
+    }
+
+
+def bench_trainer(map_path, num_cars, episodes, vectorized):
+    """End-to-end headless Trainer: environment steps per second including learning."""
+    from main_train import Trainer
+
+    with tempfile.TemporaryDirectory() as save_dir, open(os.devnull, 'w') as devnull, \
+            redirect_stdout(devnull):
+        trainer = Trainer(map_path, num_cars=num_cars, use_gui=False, vectorized=vectorized,
+                          save_dir=save_dir)
+
+        env_steps = [0]
+        env_step = trainer.env.step
+
+        def counting_step(*args):
+            env_steps[0] += 1 if not vectorized else num_cars
+            return env_step(*args)
+
+        trainer.env.step = counting_step
+
+        start = timeit.default_timer()
+        trainer.train(num_episodes=episodes)
+        elapsed = timeit.default_timer() - start
+
+    return {
+        'episodes': episodes,
+        'env_steps': env_steps[0],
+        'seconds': elapsed,
+        'env_steps_per_sec': env_steps[0] / elapsed,
+    }
+
+
+def git_commit():
+    """Current git commit of the working tree, or None outside a repository."""
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'], cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    """Run the benchmark suite and write JSON results."""
+    parser = argparse.ArgumentParser(description='Benchmark simulation, sensing, replay and learning hot paths')
+    parser.add_argument('--map', type=str, default='map.png', help='Path to map image')
+    parser.add_argument('--output', type=str, default=None, help='Write JSON here (default: stdout)')
+    parser.add_argument('--cars', type=str, default='1,8,64', help='Comma-separated car counts')
+    parser.add_argument('--number', type=int, default=1000, help='Calls per timing run')
+    parser.add_argument('--repeat', type=int, default=5, help='Timing runs per benchmark (best is reported)')
+    parser.add_argument('--episodes', type=int, default=5, help='Episodes for the end-to-end Trainer runs')
+    parser.add_argument('--quick', action='store_true', help='Small sizes for a fast smoke run')
+    parser.add_argument('--skip-trainer', action='store_true', help='Skip the end-to-end Trainer runs')
+
+    args = parser.parse_args()
+
+    number, repeat, episodes = args.number, args.repeat, args.episodes
+    if args.quick:
+        number, repeat, episodes = 100, 2, 1
+
+    car_counts = [int(c) for c in args.cars.split(',')]
+
+    # One intra-op thread keeps runs comparable across machines and with actor processes
+    torch.set_num_threads(1)
+
+    results = {}
+    print("Benchmarking cast_ray...", file=sys.stderr)
+    results['cast_ray'] = bench_cast_ray(args.map, number, repeat)
+    print("Benchmarking car...", file=sys.stderr)
+    results['car'] = bench_car(args.map, number, repeat)
+    print("Benchmarking environment...", file=sys.stderr)
+    results['environment'] = bench_environment(args.map, car_counts, number, repeat)
+    print("Benchmarking replay buffer...", file=sys.stderr)
+    results['replay_buffer'] = bench_replay(number, repeat)
+    print("Benchmarking agent...", file=sys.stderr)
+    results['agent'] = bench_agent(number, repeat)
+
+    if not args.skip_trainer:
+        results['trainer'] = {}
+        for num_cars in car_counts:
+            for vectorized in (False, True):
+                name = f"{'vec' if vectorized else 'loop'}_{num_cars}"
+                print(f"Benchmarking trainer ({name})...", file=sys.stderr)
+                results['trainer'][name] = bench_trainer(args.map, num_cars, episodes, vectorized)
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'git_commit': git_commit(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'torch': torch.__version__,
+            'platform': platform.platform(),
+            'number': number,
+            'repeat': repeat,
+        },
+        'results': results,
+    }
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+        print(f"Results written to {args.output}", file=sys.stderr)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
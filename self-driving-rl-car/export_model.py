@@ -0,0 +1,27 @@
+import argparse
+import os
+
+import torch
+
+from ml.neural_network import export_npz
+
+
+def main():
+    """Export a training checkpoint's Q-network to .npz for torch-free inference."""
+    parser = argparse.ArgumentParser(description='Export a trained Q-network to NumPy (.npz)')
+    parser.add_argument('--model', type=str, default='models/final_model.pth',
+                        help='Training checkpoint (.pth)')
+    parser.add_argument('--output', type=str, default=None,
+                        help='Output .npz (default: next to the checkpoint)')
+    
+    args = parser.parse_args()
+    
+    output = args.output or os.path.splitext(args.model)[0] + '.npz'
+    checkpoint = torch.load(args.model, map_location='cpu')
+    export_npz(checkpoint['qnetwork_local_state_dict'], output)
+    
+    print(f"Exported {args.model} -> {output} ({os.path.getsize(output) / 1024:.1f} KB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -30,14 +30,9 @@ class Renderer:
         self.screen.blit(rotated, rect)
 
     def draw_sensors(self, car):
-        angles = [
-            car.angle,
-            car.angle + math.pi / 4,
-            car.angle - math.pi / 4,
-            car.angle + math.pi / 2,
-            car.angle - math.pi / 2
-        ]
+        angles = car.sensor_angles()
 
+        # Readings the car cached for this tick; no rays are cast again
         distances = car.sensors()
 
         for angle, dist in zip(angles, distances):
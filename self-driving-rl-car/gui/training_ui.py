@@ -45,6 +45,7 @@ class TrainingUI:
         self.avg_reward = 0.0
         self.epsilon = 1.0
         self.loss = 0.0
+        self.phase_times = {}
         
         # Buttons
         self.buttons = self._create_buttons()
@@ -125,7 +126,7 @@ class TrainingUI:
         self.buttons['start_pause']['text'] = 'Start Training'
         self.buttons['start_pause']['color'] = (50, 200, 50)
     
-    def update_stats(self, episode, reward, epsilon, loss=None):
+    def update_stats(self, episode, reward, epsilon, loss=None, phase_times=None):
         """
         Update training statistics.
         
@@ -134,7 +135,12 @@ class TrainingUI:
             reward (float): Episode reward
             epsilon (float): Current epsilon value
             loss (float): Training loss
+            phase_times (dict): Per-phase timings of the episode
+                (name -> {'calls', 'ms'}), shown when profiling
         """
+        if phase_times is not None:
+            self.phase_times = phase_times
+        
         self.current_episode = episode
         self.current_reward = reward
         self.epsilon = epsilon
@@ -202,6 +208,17 @@ class TrainingUI:
             text_surf = self.font_small.render(stat, True, (255, 255, 255))
             self.screen.blit(text_surf, (stats_x, stats_y + i * line_height))
         
+        # Draw per-phase timings (only when profiling)
+        if self.phase_times:
+            timing_y = stats_y + len(stats) * line_height + 15
+            title_surf = self.font_medium.render("Timing (ms/episode)", True, (255, 255, 100))
+            self.screen.blit(title_surf, (stats_x, timing_y))
+            
+            for i, (name, entry) in enumerate(self.phase_times.items()):
+                text = f"{name}: {entry['ms']:.1f}"
+                text_surf = self.font_small.render(text, True, (200, 200, 200))
+                self.screen.blit(text_surf, (stats_x, timing_y + 25 + i * 18))
+        
         # Draw reward graph
         self._draw_graph(
             data=list(self.episode_rewards),
@@ -4,14 +4,35 @@ import os
 import math
 
 from ml.environment import CarEnvironment
-from ml.dqn_agent import DQNAgent
+from ml.numpy_policy import NumpyQNetwork
 from gui.renderer import Renderer
 
 
+def load_policy(model_path):
+    """
+    Load the greedy policy network.
+    
+    Exported .npz models run on NumPy alone. A training checkpoint (.pth)
+    is exported next to itself first, which needs torch once.
+    """
+    if model_path.endswith('.pth'):
+        import torch
+        from ml.neural_network import export_npz
+        
+        npz_path = os.path.splitext(model_path)[0] + '.npz'
+        checkpoint = torch.load(model_path, map_location='cpu')
+        export_npz(checkpoint['qnetwork_local_state_dict'], npz_path)
+        print(f"Exported {model_path} -> {npz_path}")
+        model_path = npz_path
+    
+    return NumpyQNetwork(model_path)
+
+
 def main():
     """Run trained AI agent."""
     parser = argparse.ArgumentParser(description='Run trained RL agent')
-    parser.add_argument('--model', type=str, default='models/final_model.pth', help='Path to model file')
+    parser.add_argument('--model', type=str, default='models/final_model.npz',
+                        help='Path to exported model (.npz) or training checkpoint (.pth)')
     parser.add_argument('--map', type=str, default='map.png', help='Path to map image')
     
     args = parser.parse_args()
@@ -32,14 +53,9 @@ def main():
     # Create environment with single car
     env = CarEnvironment(args.map, num_cars=1)
     
-    # Create agent and load model
-    state_size = env.get_state_size()
-    action_size = env.get_action_size()
-    agent = DQNAgent(state_size, action_size, hidden_sizes=[128, 64])
-    
+    # Load the policy network (greedy, no exploration)
     print(f"Loading model: {args.model}")
-    agent.load(args.model)
-    agent.epsilon = 0.0  # No exploration, only exploitation
+    policy = load_policy(args.model)
     
     print("AI agent loaded successfully!")
     print("Press R to reset, ESC to quit")
@@ -71,8 +87,8 @@ def main():
                     steps = 0
                     print("Environment reset")
         
-        # Get action from agent
-        action = agent.act(state, epsilon=0.0)
+        # Get action from policy
+        action = policy.act(state)
         
         # Take step
         next_state, reward, done, info = env.step(0, action)
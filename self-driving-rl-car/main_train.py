@@ -1,19 +1,29 @@
-import pygame
+import numpy as np
 import argparse
 import os
 import math
+import random
+import time
+import torch
 from datetime import datetime
 
-from ml.environment import CarEnvironment
+from ml.environment import CarEnvironment, VecCarEnvironment
 from ml.dqn_agent import DQNAgent
-from gui.training_ui import TrainingUI
-from gui.renderer import Renderer
+from ml.distributed import ActorPool
+from ml.instrumentation import PhaseTimer
+from ml.replay_buffer import NStepAccumulator
+from ml.async_learner import AsyncLearner
+from ml.checkpoint_writer import CheckpointWriter
+from ml.metrics import MetricsLogger, trim_metrics
 
 
 class Trainer:
     """Main training class supporting both GUI and headless modes."""
     
-    def __init__(self, map_path, num_cars=1, use_gui=True, training_speed=1):
+    def __init__(self, map_path, num_cars=1, use_gui=True, training_speed=1, vectorized=False,
+                 agent_options=None, num_actors=0, decoupled_render=False, render_fps=30,
+                 save_dir="models", profile=False, profile_output=None, env_options=None,
+                 n_step=1, async_learner=False, keep_checkpoints=5, metrics_path=None):
         """
         Initialize trainer.
         
@@ -22,19 +32,73 @@ class Trainer:
             num_cars (int): Number of cars to train simultaneously
             use_gui (bool): Whether to use GUI
             training_speed (int): Training speed multiplier (GUI only)
+            vectorized (bool): Step all cars at once with VecCarEnvironment
+            agent_options (dict): Extra keyword arguments for DQNAgent
+            num_actors (int): If > 0, train with this many actor processes,
+                each simulating num_cars cars (headless only)
+            decoupled_render (bool): Run the training loop unthrottled and draw
+                a frame of the current state at most render_fps times per
+                second of wall-clock time (GUI only)
+            render_fps (int): Frame rate of decoupled rendering
+            save_dir (str): Directory for saved models and checkpoints
+            profile (bool): Record per-phase timings, reported per episode
+            profile_output (str): Optional JSONL file receiving the per-episode timings
+            env_options (dict): Extra keyword arguments for the environment
+            n_step (int): Store n-step returns instead of one-step transitions
+            async_learner (bool): Run gradient updates on a background thread
+                while this thread keeps stepping the environment
+            keep_checkpoints (int): Periodic and manual checkpoints kept on
+                disk, each kind separately (0 = keep all)
+            metrics_path (str): Optional .jsonl/.csv file receiving one record
+                per episode (reward, steps, distance, epsilon, loss, throughput);
+                started over by train() unless resuming from a checkpoint
         """
         self.map_path = map_path
         self.num_cars = num_cars
         self.use_gui = use_gui
         self.training_speed = training_speed
+        self.vectorized = vectorized
+        self.num_actors = num_actors
+        self.decoupled_render = decoupled_render
+        self.render_interval = 1.0 / render_fps
+        self._next_frame_time = 0.0
+        
+        if num_actors > 0 and use_gui:
+            raise ValueError("Actor processes only run headless (use --no-gui)")
+        if num_actors > 0 and async_learner:
+            raise ValueError("The actor/learner mode already learns apart from acting")
         
         # Create environment
-        self.env = CarEnvironment(map_path, num_cars=num_cars)
+        self.env_options = env_options or {}
+        if vectorized:
+            self.env = VecCarEnvironment(map_path, num_cars=num_cars, **self.env_options)
+        else:
+            self.env = CarEnvironment(map_path, num_cars=num_cars, **self.env_options)
         
         # Create agent
         state_size = self.env.get_state_size()
         action_size = self.env.get_action_size()
-        self.agent = DQNAgent(state_size, action_size, hidden_sizes=[128, 64])
+        self.agent = DQNAgent(state_size, action_size, hidden_sizes=[128, 64],
+                              **(agent_options or {}))
+        
+        # Background learner thread, started for the duration of train()
+        self.learner = AsyncLearner(self.agent) if async_learner else None
+        
+        # Per-car n-step windows in front of the replay buffer (actors keep their own)
+        self.n_step = n_step
+        self.n_step_accumulator = None
+        if n_step > 1:
+            self.n_step_accumulator = NStepAccumulator(num_cars, n_step, self.agent.gamma, state_size)
+        
+        # Per-episode metrics stream, opened by train() (see ml.metrics.read_metrics)
+        self.metrics_path = metrics_path
+        self.metrics = None
+        self._episode_start = 0.0
+        
+        # Per-phase timings shared by the loop, the environment and the agent
+        self.timer = PhaseTimer(enabled=profile, output_path=profile_output)
+        self.env.timer = self.timer
+        self.agent.timer = self.timer
         
         # GUI components
         self.renderer = None
@@ -42,6 +106,11 @@ class Trainer:
         self.screen = None
         
         if use_gui:
+            # pygame and the GUI modules are only loaded when a window is needed
+            import pygame
+            from gui.training_ui import TrainingUI
+            from gui.renderer import Renderer
+            
             pygame.init()
             self.width = 1000
             self.height = 800
@@ -55,9 +124,13 @@ class Trainer:
         # Training state
         self.is_training = False
         self.total_episodes = 0
-        self.save_dir = "models"
+        self.save_dir = save_dir
         os.makedirs(self.save_dir, exist_ok=True)
         
+        # Checkpoints are serialized on a background thread
+        self.checkpoint_writer = CheckpointWriter(save_dir, keep_last=keep_checkpoints)
+        self._replay_dir = None  # Replay directory of the last resume checkpoint
+        
     def train(self, num_episodes=1000):
         """
         Train the agent.
@@ -69,77 +142,334 @@ class Trainer:
         print(f"Mode: {'GUI' if self.use_gui else 'Headless'}")
         print(f"Number of cars: {self.num_cars}")
         
-        for episode in range(num_episodes):
+        if self.metrics_path and self.metrics is None:
+            self._open_metrics()
+        
+        self._episode_start = time.perf_counter()
+        if self.num_actors > 0:
+            try:
+                self._train_distributed(num_episodes)
+            finally:
+                self._finish_writes()
+            return
+        
+        if self.learner is not None:
+            self.learner.start()
+        try:
+            if self.vectorized:
+                self._train_vectorized(num_episodes)
+            else:
+                self._train_loop(num_episodes)
+        finally:
+            if self.learner is not None:
+                self.learner.stop()
+            self._finish_writes()
+    
+    def _open_metrics(self):
+        """Start the metrics file, or continue it after the resumed episode."""
+        resumed = self.total_episodes > 0
+        if resumed and os.path.exists(self.metrics_path):
+            trim_metrics(self.metrics_path, self.total_episodes)
+        self.metrics = MetricsLogger(self.metrics_path, append=resumed)
+    
+    def _finish_writes(self):
+        """Wait for queued checkpoints and flush buffered metrics."""
+        if self.metrics is not None:
+            self.metrics.flush()
+        self.checkpoint_writer.wait()
+    
+    def _train_loop(self, num_episodes):
+        """
+        Training loop over CarEnvironment, stepping the running cars one by one.
+        
+        Args:
+            num_episodes (int): Number of episodes to train
+        """
+        for episode in range(self.total_episodes, num_episodes):
             self.total_episodes = episode + 1
             
             # Reset environment for all cars
             states = self.env.reset()
+            if self.n_step_accumulator is not None:
+                self.n_step_accumulator.reset()
             episode_rewards = [0.0] * self.num_cars
+            episode_distances = [0.0] * self.num_cars
             dones = [False] * self.num_cars
             steps = 0
+            env_steps = 0
             
             while not all(dones):
                 steps += 1
                 
-                # Handle GUI events
-                if self.use_gui:
-                    if not self._handle_events():
+                # Handle GUI events (every step, or only with a frame when decoupled)
+                frame_due = self.use_gui and self._frame_due(steps)
+                if self.use_gui and (frame_due or not self.decoupled_render):
+                    if not self._poll_gui():
                         return  # User closed window
-                    
-                    # Wait if paused
-                    while not self.training_ui.is_training and self.use_gui:
-                        if not self._handle_events():
-                            return
-                        pygame.time.wait(100)
+                
+                # Select actions for all running cars in one forward pass
+                active = [car_idx for car_idx in range(self.num_cars) if not dones[car_idx]]
+                with self.timer.phase('act'):
+                    actions = self.agent.act_batch(np.array([states[car_idx] for car_idx in active]))
                 
                 # Step each car
-                for car_idx in range(self.num_cars):
-                    if dones[car_idx]:
-                        continue
-                    
-                    # Select action
-                    action = self.agent.act(states[car_idx])
-                    
+                for car_idx, action in zip(active, actions):
                     # Take step
-                    next_state, reward, done, info = self.env.step(car_idx, action)
+                    with self.timer.phase('env_step'):
+                        next_state, reward, done, info = self.env.step(car_idx, action)
                     
                     # Store experience and learn
-                    self.agent.step(states[car_idx], action, reward, next_state, done)
+                    if self.n_step_accumulator is None:
+                        self.agent.step(states[car_idx], action, reward, next_state, done)
+                    else:
+                        self.agent.step_batch(*self.n_step_accumulator.add(
+                            [car_idx], [states[car_idx]], [action], [reward], [next_state], [done]
+                        ))
                     
                     # Update state and reward
                     states[car_idx] = next_state
                     episode_rewards[car_idx] += reward
+                    episode_distances[car_idx] = info['distance']
                     dones[car_idx] = done
+                    env_steps += 1
                 
                 # Render if using GUI
-                if self.use_gui and steps % self.training_speed == 0:
+                if frame_due:
                     self._render()
             
             # Episode finished
             avg_reward = sum(episode_rewards) / self.num_cars
-            self.agent.update_epsilon()
-            
-            # Update UI
-            if self.use_gui:
-                self.training_ui.update_stats(
-                    episode=self.total_episodes,
-                    reward=avg_reward,
-                    epsilon=self.agent.epsilon,
-                    loss=0.0  # Loss is tracked internally
-                )
+            self._end_episode(episode, num_episodes, avg_reward, env_steps,
+                              sum(episode_distances) / self.num_cars)
+        
+        print("Training completed!")
+        self.save_model("final_model.pth", flush_replay=False)
+        self.export_model("final_model.npz")
+        self.save_checkpoint()
+    
+    def _train_vectorized(self, num_episodes):
+        """
+        Training loop over VecCarEnvironment.
+        
+        Cars reset themselves when they crash or time out, so no car ever
+        idles. An episode ends once every car has finished at least one run
+        since the episode started; its reward is the mean over those runs.
+        
+        Args:
+            num_episodes (int): Number of episodes to train
+        """
+        states = self.env.reset()
+        car_rewards = np.zeros(self.num_cars)
+        all_cars = np.arange(self.num_cars)
+        steps = 0
+        
+        for episode in range(self.total_episodes, num_episodes):
+            self.total_episodes = episode + 1
+            finished = np.zeros(self.num_cars, dtype=bool)
+            finished_rewards = []
+            finished_distances = []
+            episode_start_steps = steps
             
-            # Print progress
-            if (episode + 1) % 10 == 0:
-                print(f"Episode {episode + 1}/{num_episodes} | "
-                      f"Avg Reward: {avg_reward:.2f} | "
-                      f"Epsilon: {self.agent.epsilon:.3f}")
+            while not finished.all():
+                steps += 1
+                
+                # Handle GUI events (every step, or only with a frame when decoupled)
+                frame_due = self.use_gui and self._frame_due(steps)
+                if self.use_gui and (frame_due or not self.decoupled_render):
+                    if not self._poll_gui():
+                        return  # User closed window
+                
+                # Select actions and step all cars at once
+                with self.timer.phase('act'):
+                    actions = self.agent.act_batch(states)
+                with self.timer.phase('env_step'):
+                    next_states, rewards, dones, info = self.env.step(actions)
+                
+                # Store experience (true next state, not the auto-reset one) and learn
+                if self.n_step_accumulator is None:
+                    self.agent.step_batch(states, actions, rewards, info['terminal_states'], dones)
+                else:
+                    self.agent.step_batch(*self.n_step_accumulator.add(
+                        all_cars, states, actions, rewards, info['terminal_states'], dones
+                    ))
+                
+                car_rewards += rewards
+                if dones.any():
+                    finished_rewards.extend(car_rewards[dones])
+                    finished_distances.extend(info['distance'][dones])
+                    car_rewards[dones] = 0.0
+                    finished |= dones
+                
+                states = next_states
+                
+                # Render if using GUI
+                if frame_due:
+                    self._render()
             
-            # Save best model
-            if (episode + 1) % 50 == 0:
-                self.save_model(f"checkpoint_ep{episode + 1}.pth")
+            # Episode finished
+            avg_reward = float(np.mean(finished_rewards))
+            self._end_episode(episode, num_episodes, avg_reward,
+                              (steps - episode_start_steps) * self.num_cars,
+                              float(np.mean(finished_distances)))
         
         print("Training completed!")
-        self.save_model("final_model.pth")
+        self.save_model("final_model.pth", flush_replay=False)
+        self.export_model("final_model.npz")
+        self.save_checkpoint()
+    
+    def _train_distributed(self, num_episodes):
+        """
+        Actor/learner training loop.
+        
+        Actor processes step their own environments and stream transitions
+        to this process, which owns the agent, learns, and publishes updated
+        weights back to the actors after every chunk it consumes. As in the
+        vectorized loop, an episode covers as many finished runs as there
+        are cars across all actors.
+        
+        Args:
+            num_episodes (int): Number of episodes to train
+        """
+        pool = ActorPool(self.map_path, self.num_actors, self.num_cars, self.agent.qnetwork_local,
+                         env_options=self.env_options, n_step=self.n_step, gamma=self.agent.gamma)
+        cars_per_episode = self.num_actors * self.num_cars
+        print(f"Actors: {self.num_actors} ({cars_per_episode} cars in total)")
+        
+        pool.set_epsilon(self.agent.epsilon)
+        pool.start()
+        
+        finished_rewards = []
+        finished_distances = []
+        env_steps = 0
+        episode = self.total_episodes
+        try:
+            while episode < num_episodes:
+                chunk = pool.get()
+                self.agent.step_batch(chunk['states'], chunk['actions'], chunk['rewards'],
+                                      chunk['next_states'], chunk['dones'], chunk['discounts'])
+                pool.publish(self.agent.qnetwork_local)
+                
+                finished_rewards.extend(chunk['episode_returns'])
+                finished_distances.extend(chunk['episode_distances'])
+                env_steps += chunk['env_steps']
+                while len(finished_rewards) >= cars_per_episode and episode < num_episodes:
+                    self.total_episodes = episode + 1
+                    avg_reward = float(np.mean(finished_rewards[:cars_per_episode]))
+                    distance = float(np.mean(finished_distances[:cars_per_episode]))
+                    del finished_rewards[:cars_per_episode]
+                    del finished_distances[:cars_per_episode]
+                    self._end_episode(episode, num_episodes, avg_reward, env_steps, distance)
+                    env_steps = 0
+                    pool.set_epsilon(self.agent.epsilon)
+                    episode += 1
+        finally:
+            pool.close()
+        
+        print("Training completed!")
+        self.save_model("final_model.pth", flush_replay=False)
+        self.export_model("final_model.npz")
+        self.save_checkpoint()
+    
+    def _end_episode(self, episode, num_episodes, avg_reward, steps, distance):
+        """
+        Episode bookkeeping: epsilon decay, UI stats, metrics, progress output and checkpoints.
+        
+        Args:
+            episode (int): Zero-based episode index
+            num_episodes (int): Total number of episodes
+            avg_reward (float): Average reward of the episode
+            steps (int): Environment steps taken in the episode (all cars)
+            distance (float): Average distance driven per finished run
+        """
+        self.agent.update_epsilon()
+        phase_times = self.timer.collect(episode=self.total_episodes)
+        loss = self.agent.collect_loss()
+        
+        now = time.perf_counter()
+        seconds = now - self._episode_start
+        self._episode_start = now
+        
+        if self.metrics is not None:
+            self.metrics.log(
+                episode=self.total_episodes,
+                reward=avg_reward,
+                steps=steps,
+                distance=float(distance),
+                epsilon=self.agent.epsilon,
+                loss=loss,
+                seconds=seconds,
+                steps_per_sec=steps / seconds if seconds > 0 else None,
+            )
+        
+        # Update UI
+        if self.use_gui:
+            self.training_ui.update_stats(
+                episode=self.total_episodes,
+                reward=avg_reward,
+                epsilon=self.agent.epsilon,
+                loss=loss,
+                phase_times=phase_times
+            )
+        
+        # Print progress
+        if (episode + 1) % 10 == 0:
+            line = (f"Episode {episode + 1}/{num_episodes} | "
+                    f"Avg Reward: {avg_reward:.2f} | "
+                    f"Epsilon: {self.agent.epsilon:.3f}")
+            if phase_times:
+                line += " | " + PhaseTimer.format(phase_times)
+            print(line)
+        
+        # Save best model
+        if (episode + 1) % 50 == 0:
+            self.save_model(f"checkpoint_ep{episode + 1}.pth", rotate="checkpoint_ep*.pth",
+                            flush_replay=False)
+            self.save_checkpoint()
+    
+    def _frame_due(self, steps):
+        """
+        Whether a frame should be drawn on this step.
+        
+        In lockstep mode every training_speed-th step is drawn (and the
+        frame waits for the 60 FPS clock). In decoupled mode frames are
+        driven by wall-clock time instead, so the loop never waits on the
+        display and drawing costs a fixed budget per second.
+        
+        Args:
+            steps (int): Steps taken in the current episode
+            
+        Returns:
+            bool: True if a frame is due
+        """
+        if not self.decoupled_render:
+            return steps % self.training_speed == 0
+        
+        now = time.perf_counter()
+        if now < self._next_frame_time:
+            return False
+        
+        self._next_frame_time = now + self.render_interval
+        return True
+    
+    def _poll_gui(self):
+        """
+        Handle GUI events and block while training is paused.
+        
+        Returns:
+            bool: False if should quit, True otherwise
+        """
+        if not self._handle_events():
+            return False
+        
+        import pygame
+        
+        # Wait if paused
+        while not self.training_ui.is_training and self.use_gui:
+            if not self._handle_events():
+                return False
+            pygame.time.wait(100)
+        
+        return True
     
     def _handle_events(self):
         """
@@ -148,6 +478,8 @@ class Trainer:
         Returns:
             bool: False if should quit, True otherwise
         """
+        import pygame
+        
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 return False
@@ -169,11 +501,12 @@ class Trainer:
                 elif button == 'save':
                     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
                     filename = f"manual_save_{timestamp}.pth"
-                    self.save_model(filename)
+                    self.save_model(filename, rotate="manual_save_*.pth")
                     print(f"Model saved: {filename}")
                 
                 elif button == 'load':
-                    # Try to load the most recent model
+                    # Try to load the most recent model (once pending saves are on disk)
+                    self.checkpoint_writer.wait()
                     models = [f for f in os.listdir(self.save_dir) if f.endswith('.pth')]
                     if models:
                         latest_model = max(models, key=lambda x: os.path.getctime(os.path.join(self.save_dir, x)))
@@ -193,27 +526,156 @@ class Trainer:
     
     def _render(self):
         """Render the training visualization."""
-        # Draw map
-        self.renderer.draw_world()
+        import pygame
         
-        # Draw all cars
-        for car in self.env.get_all_cars():
-            self.renderer.draw_car(car)
-            self.renderer.draw_sensors(car)
+        with self.timer.phase('render'):
+            # Draw map
+            self.renderer.draw_world()
+            
+            # Draw all cars
+            for car in self.env.get_all_cars():
+                self.renderer.draw_car(car)
+                self.renderer.draw_sensors(car)
+            
+            # Draw UI
+            self.training_ui.draw()
+            
+            pygame.display.flip()
+            
+            # Decoupled frames are already paced by wall-clock time
+            if not self.decoupled_render:
+                self.renderer.clock.tick(60)
+    
+    def save_model(self, filename, rotate=None, flush_replay=True):
+        """
+        Save model to file (and persist an on-disk replay buffer).
         
-        # Draw UI
-        self.training_ui.draw()
+        The weights are snapshotted to CPU here and written by the
+        checkpoint writer thread, which also flushes an on-disk replay
+        buffer, so this returns without waiting on disk.
         
-        pygame.display.flip()
-        self.renderer.clock.tick(60)
+        Args:
+            filename (str): File name inside save_dir
+            rotate (str): Glob pattern of files of which only the newest
+                keep_checkpoints are kept
+            flush_replay (bool): Flush an on-disk replay buffer; False when a
+                save_checkpoint follows, which flushes it anyway
+        """
+        self.checkpoint_writer.submit(filename, self.agent.state_dict(), rotate=rotate)
+        if flush_replay:
+            with self.agent.memory_lock:
+                self.checkpoint_writer.call(self.agent.memory.prepare_flush())
     
-    def save_model(self, filename):
-        """Save model to file."""
+    def export_model(self, filename):
+        """Export the Q-network for torch-free inference (main_ai.py)."""
         filepath = os.path.join(self.save_dir, filename)
-        self.agent.save(filepath)
+        self.agent.export(filepath)
+    
+    def save_checkpoint(self):
+        """
+        Save everything needed to resume training to save_dir/resume.
+        
+        Besides the weights this covers the replay transitions, the agent's
+        counters and sampling state, the episode count and the Python, NumPy
+        and torch RNG states. The network options (dueling head, Double DQN)
+        are recorded too and must match when resuming.
+        
+        Transitions alternate between two replay directories, and the state
+        file (written last, atomically, by the checkpoint writer thread)
+        names the one that belongs to it. A save therefore never touches
+        the directory the current state file points to, and an interrupted
+        save leaves the previous checkpoint loadable. Each directory is
+        brought up to date incrementally: only rows added since its own
+        last save are copied here and written by the writer thread.
+        
+        An on-disk replay buffer (--replay-dir) is the live buffer and is
+        just flushed in place; it keeps changing between checkpoints, so a
+        crash can leave it ahead of the state file.
+        """
+        resume_dir = os.path.join(self.save_dir, "resume")
+        os.makedirs(resume_dir, exist_ok=True)
+        
+        # No wait for pending writes: the writer runs jobs in order, so this
+        # save lands after the one that last used the spare directory (a
+        # replay.json read before that lands only makes the copy larger)
+        memory = self.agent.memory
+        replay_dir = getattr(memory, 'directory', None)
+        if replay_dir is None:
+            current = self._checkpoint_replay_dir()
+            replay_dir = next(path for path in (os.path.join(resume_dir, "replay_0"),
+                                                os.path.join(resume_dir, "replay_1"))
+                              if current is None or os.path.abspath(path) != current)
+        with self.agent.memory_lock:
+            self.checkpoint_writer.call(memory.prepare_save(replay_dir))
+        
+        state = {
+            'total_episodes': self.total_episodes,
+            'replay_dir': os.path.abspath(replay_dir),
+            'agent': self.agent.state_dict(training=True),
+            'dueling': self.agent.qnetwork_local.dueling,
+            'double_dqn': self.agent.double_dqn,
+            'python_rng': random.getstate(),
+            'numpy_rng': np.random.get_state(),
+            'torch_rng': torch.get_rng_state(),
+            'cuda_rng': torch.cuda.get_rng_state_all() if torch.cuda.is_available() else None,
+        }
+        self.checkpoint_writer.submit(os.path.join("resume", "trainer_state.pth"), state)
+        self._replay_dir = state['replay_dir']
+    
+    def _checkpoint_replay_dir(self):
+        """Absolute replay directory of the checkpoint on disk, or None without one."""
+        if self._replay_dir is None:
+            state = self._read_checkpoint()
+            if state is not None:
+                self._replay_dir = os.path.abspath(state['replay_dir'])
+        return self._replay_dir
+    
+    def _read_checkpoint(self):
+        filepath = os.path.join(self.save_dir, "resume", "trainer_state.pth")
+        if not os.path.exists(filepath):
+            return None
+        
+        # RNG states are not plain tensors (weights_only=False); the torch RNG state must stay on CPU
+        return torch.load(filepath, map_location='cpu', weights_only=False)
+    
+    def load_checkpoint(self):
+        """
+        Restore the state written by ``save_checkpoint``.
+        
+        Per-car n-step windows and car poses are not part of the checkpoint;
+        the environment starts the resumed run from a reset.
+        
+        Returns:
+            bool: False if save_dir holds no checkpoint
+        """
+        self.checkpoint_writer.wait()
+        state = self._read_checkpoint()
+        if state is None:
+            return False
+        
+        current = {'dueling': self.agent.qnetwork_local.dueling, 'double_dqn': self.agent.double_dqn}
+        for key, flag in (('dueling', '--dueling'), ('double_dqn', '--double-dqn')):
+            if key in state and state[key] != current[key]:
+                used = "with" if state[key] else "without"
+                raise ValueError(f"Checkpoint was trained {used} {flag}; "
+                                 f"resume {used} it or start a new run")
+        
+        with self.agent.memory_lock:
+            self.agent.memory.load(state['replay_dir'])
+        self.agent.load_state_dict(state['agent'])
+        self.total_episodes = state['total_episodes']
+        self._replay_dir = os.path.abspath(state['replay_dir'])
+        
+        random.setstate(state['python_rng'])
+        np.random.set_state(state['numpy_rng'])
+        torch.set_rng_state(state['torch_rng'])
+        if state['cuda_rng'] is not None and torch.cuda.is_available():
+            torch.cuda.set_rng_state_all(state['cuda_rng'])
+        return True
     
     def load_model(self, filename):
         """Load model from file."""
+        self.checkpoint_writer.wait()
         filepath = os.path.join(self.save_dir, filename)
         if os.path.exists(filepath):
             self.agent.load(filepath)
@@ -229,7 +691,63 @@ def main():
     parser.add_argument('--cars', type=int, default=1, help='Number of cars to train simultaneously')
     parser.add_argument('--episodes', type=int, default=500, help='Number of training episodes')
     parser.add_argument('--speed', type=int, default=1, help='Training speed multiplier (GUI only)')
-    parser.add_argument('--map', type=str, default='map.png', help='Path to map image')
+    parser.add_argument('--map', type=str, default='map.png',
+                        help='Path to map image (headless runs also accept a CollisionMap.save directory)')
+    parser.add_argument('--decoupled-render', action='store_true',
+                        help='Train unthrottled and draw frames on a wall-clock budget (GUI only)')
+    parser.add_argument('--render-fps', type=int, default=30,
+                        help='Frame rate of --decoupled-render')
+    parser.add_argument('--profile', action='store_true',
+                        help='Record per-phase timings (printed with progress, shown in the GUI)')
+    parser.add_argument('--profile-output', type=str, default=None,
+                        help='Append per-episode phase timings to this JSONL file (implies --profile)')
+    parser.add_argument('--footprint-collision', action='store_true',
+                        help='Check the whole car footprint with configuration-space maps')
+    parser.add_argument('--single-turn', action='store_true',
+                        help='Apply the angular speed once per tick instead of the original twice')
+    parser.add_argument('--vec-env', action='store_true',
+                        help='Step all cars at once with the vectorized environment')
+    parser.add_argument('--actors', type=int, default=0,
+                        help='Number of actor processes (0 = train in a single process); '
+                             '--cars is then the number of cars per actor')
+    parser.add_argument('--prioritized', action='store_true',
+                        help='Use prioritized experience replay')
+    parser.add_argument('--per-alpha', type=float, default=0.6,
+                        help='Prioritized replay: priority exponent (0 = uniform)')
+    parser.add_argument('--per-beta', type=float, default=0.4,
+                        help='Prioritized replay: initial importance-sampling exponent')
+    parser.add_argument('--n-step', type=int, default=1,
+                        help='Learn from n-step returns (1 = one-step transitions)')
+    parser.add_argument('--double-dqn', action='store_true',
+                        help='Use Double DQN targets (local network selects, target network evaluates)')
+    parser.add_argument('--dueling', action='store_true',
+                        help='Use a dueling value/advantage Q-network head')
+    parser.add_argument('--async-learner', action='store_true',
+                        help='Run gradient updates on a background thread overlapping env stepping')
+    parser.add_argument('--buffer-size', type=int, default=100000,
+                        help='Replay buffer capacity in transitions')
+    parser.add_argument('--replay-dir', type=str, default=None,
+                        help='Keep the replay buffer in memory-mapped files here; '
+                             'an existing buffer is reopened to warm-start learning')
+    parser.add_argument('--batch-size', type=int, default=64,
+                        help='Minibatch size of each gradient step')
+    parser.add_argument('--update-every', type=int, default=4,
+                        help='Environment transitions between update triggers')
+    parser.add_argument('--updates-per-step', type=int, default=1,
+                        help='Gradient steps per update trigger, sampled in one draw '
+                             '(replay ratio = updates-per-step * batch-size / update-every)')
+    parser.add_argument('--target-update-every', type=int, default=0,
+                        help='Hard-sync the target network every N learning steps '
+                             '(0 = soft update after every step)')
+    parser.add_argument('--metrics', type=str, default='models/metrics.jsonl',
+                        help='Per-episode metrics file, .jsonl or .csv; started over unless --resume '
+                             '(empty string to disable)')
+    parser.add_argument('--keep-checkpoints', type=int, default=5,
+                        help='Periodic checkpoints (and manual GUI saves) kept on disk (0 = all)')
+    parser.add_argument('--resume', action='store_true',
+                        help='Continue from the last checkpoint in the save directory '
+                             '(replay buffer, counters and RNG states included); '
+                             '--episodes is the total including episodes already trained')
     parser.set_defaults(gui=True)
     
     args = parser.parse_args()
@@ -239,9 +757,42 @@ def main():
         map_path=args.map,
         num_cars=args.cars,
         use_gui=args.gui,
-        training_speed=args.speed
+        training_speed=args.speed,
+        vectorized=args.vec_env,
+        agent_options={
+            'prioritized': args.prioritized,
+            'per_alpha': args.per_alpha,
+            'per_beta': args.per_beta,
+            'double_dqn': args.double_dqn,
+            'dueling': args.dueling,
+            'target_update_every': args.target_update_every,
+            'buffer_size': args.buffer_size,
+            'replay_dir': args.replay_dir,
+            'batch_size': args.batch_size,
+            'update_every': args.update_every,
+            'updates_per_step': args.updates_per_step,
+        },
+        num_actors=args.actors,
+        decoupled_render=args.decoupled_render,
+        render_fps=args.render_fps,
+        profile=args.profile or args.profile_output is not None,
+        profile_output=args.profile_output,
+        env_options={
+            'footprint_collision': args.footprint_collision,
+            'double_turn': not args.single_turn,
+        },
+        n_step=args.n_step,
+        async_learner=args.async_learner,
+        keep_checkpoints=args.keep_checkpoints,
+        metrics_path=args.metrics or None
     )
     
+    if args.resume:
+        if trainer.load_checkpoint():
+            print(f"Resumed after episode {trainer.total_episodes}")
+        else:
+            print("No checkpoint found, starting fresh")
+    
     # Start training UI if using GUI
     if args.gui:
         trainer.training_ui.toggle_training()  # Auto-start training
@@ -255,6 +806,7 @@ def main():
         print("\nTraining interrupted by user")
     finally:
         if args.gui:
+            import pygame
             pygame.quit()
 
 
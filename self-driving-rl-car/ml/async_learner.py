@@ -0,0 +1,123 @@
+import copy
+import threading
+from contextlib import nullcontext
+
+
+class AsyncLearner:
+    """
+    Background thread that runs a DQNAgent's gradient updates.
+    
+    While it runs, ``agent.step``/``agent.step_batch`` only store
+    transitions and queue the updates they would have run; the thread
+    works through that queue while the caller keeps stepping the
+    environment. PyTorch releases the GIL inside its kernels, so the two
+    overlap on a multicore machine.
+    
+    The agent acts with its own copy of the Q-network. After every
+    ``publish_every`` updates the learner copies the local network into it
+    under a lock, so acting never sees half-written weights and costs no
+    more than one uncontended lock acquisition.
+    """
+    
+    def __init__(self, agent, publish_every=1, max_pending=64):
+        """
+        Initialize async learner.
+        
+        Args:
+            agent (DQNAgent): Agent whose updates run in the background
+            publish_every (int): Updates between publishes to the acting network
+            max_pending (int): Queued updates after which the caller blocks
+                until the learner catches up (keeps the replay ratio honest)
+        """
+        self.agent = agent
+        self.publish_every = publish_every
+        self.max_pending = max_pending
+        
+        self.pending = 0
+        self.updates = 0
+        self.last_loss = 0.0
+        self.error = None
+        self._stopping = False
+        self._condition = threading.Condition()
+        self._thread = None
+    
+    def start(self):
+        """Install the locks and acting network on the agent and start the thread."""
+        agent = self.agent
+        agent.memory_lock = threading.Lock()
+        agent.network_lock = threading.Lock()
+        agent.act_lock = threading.Lock()
+        agent.qnetwork_act = copy.deepcopy(agent.qnetwork_local)
+        agent.learner = self
+        
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name='async-learner', daemon=True)
+        self._thread.start()
+    
+    def request(self, num_updates):
+        """
+        Queue gradient updates (called by the agent from the acting thread).
+        
+        Blocks while more than max_pending updates are outstanding.
+        """
+        if self.error is not None:
+            raise RuntimeError("Async learner thread failed") from self.error
+        
+        with self._condition:
+            while self.pending >= self.max_pending and not self._stopping:
+                self._condition.wait()
+            self.pending += num_updates
+            self._condition.notify_all()
+    
+    def _run(self):
+        try:
+            self._learn_loop()
+        except BaseException as e:
+            # Surface the failure in the acting thread instead of blocking it
+            self.error = e
+            with self._condition:
+                self._stopping = True
+                self._condition.notify_all()
+    
+    def _learn_loop(self):
+        agent = self.agent
+        
+        while True:
+            with self._condition:
+                while self.pending == 0 and not self._stopping:
+                    self._condition.wait()
+                if self._stopping:
+                    return
+                num_updates = min(self.pending, self.publish_every)
+                self.pending -= num_updates
+                self._condition.notify_all()
+            
+            with agent.network_lock:
+                self.last_loss = agent._learn_from_memory(num_updates)
+            self.updates += num_updates
+            
+            # Publish: one in-place copy into the acting network
+            with agent.act_lock:
+                agent.hard_update(agent.qnetwork_local, agent.qnetwork_act)
+    
+    def stop(self):
+        """
+        Stop the thread, publish the final weights and restore inline learning.
+        
+        Updates still queued are dropped.
+        """
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        
+        agent = self.agent
+        with agent.act_lock:
+            agent.hard_update(agent.qnetwork_local, agent.qnetwork_act)
+        agent.learner = None
+        agent.qnetwork_act = agent.qnetwork_local
+        agent.memory_lock = nullcontext()
+        agent.network_lock = nullcontext()
+        agent.act_lock = nullcontext()
@@ -0,0 +1,126 @@
+import glob
+import os
+import queue
+import threading
+
+import torch
+
+
+def cpu_snapshot(obj):
+    """
+    Copy every tensor in a (nested) state dict to CPU memory.
+    
+    The copy is detached from the live parameters and optimizer buffers, so
+    it can be serialized later while training keeps updating them.
+    
+    Args:
+        obj: Tensor, or dict/list/tuple containing tensors (other values are kept)
+    """
+    if isinstance(obj, torch.Tensor):
+        return obj.detach().to('cpu', copy=True)
+    if isinstance(obj, dict):
+        return {key: cpu_snapshot(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return type(obj)(cpu_snapshot(value) for value in obj)
+    return obj
+
+
+class CheckpointWriter:
+    """
+    Background thread that serializes checkpoints with ``torch.save``.
+    
+    ``submit`` only queues an already-snapshotted state (see
+    ``cpu_snapshot``), so the training loop never waits on pickling or
+    disk I/O. Each file is written to a temporary name and renamed into
+    place, so readers see either the previous file or the complete new
+    one, never a torn write. Files matching a ``rotate`` pattern are pruned
+    to the newest ``keep_last`` after every write, bounding disk usage.
+    Other disk work (e.g. flushing a replay buffer) can be queued with
+    ``call`` and runs in order with the checkpoints.
+    """
+    
+    def __init__(self, directory, keep_last=5):
+        """
+        Initialize checkpoint writer.
+        
+        Args:
+            directory (str): Directory the checkpoints are written to
+            keep_last (int): Files kept per rotate pattern (0 = keep all)
+        """
+        self.directory = directory
+        self.keep_last = keep_last
+        
+        self.error = None
+        self._write_order = {}  # Path -> write count, orders files with equal mtimes
+        self._writes = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='checkpoint-writer', daemon=True)
+        self._thread.start()
+    
+    def submit(self, filename, state, rotate=None):
+        """
+        Queue a state for writing (returns immediately).
+        
+        Args:
+            filename (str): File name inside the writer's directory
+            state (dict): Snapshot to pass to ``torch.save``; must not be
+                modified afterwards
+            rotate (str): Glob pattern (e.g. "checkpoint_ep*.pth") of files
+                of which only the newest keep_last are kept
+        """
+        self.call(lambda: self._write(filename, state, rotate))
+    
+    def call(self, fn):
+        """
+        Queue a function to run on the writer thread (returns immediately).
+        
+        Args:
+            fn (callable): Function without arguments; it must only use data
+                that the caller no longer modifies
+        """
+        self._check()
+        self._queue.put(fn)
+    
+    def wait(self):
+        """Block until every queued checkpoint is on disk."""
+        self._queue.join()
+        self._check()
+    
+    def close(self):
+        """Write what is queued, then stop the thread."""
+        self._queue.put(None)
+        self._thread.join()
+        self._check()
+    
+    def _check(self):
+        if self.error is not None:
+            raise RuntimeError("Checkpoint writer thread failed") from self.error
+    
+    def _run(self):
+        while True:
+            fn = self._queue.get()
+            try:
+                if fn is None:
+                    return
+                if self.error is None:
+                    fn()
+            except BaseException as e:
+                # Raised in the training thread by the next submit/call/wait
+                self.error = e
+            finally:
+                self._queue.task_done()
+    
+    def _write(self, filename, state, rotate):
+        filepath = os.path.join(self.directory, filename)
+        torch.save(state, filepath + ".tmp")
+        os.replace(filepath + ".tmp", filepath)
+        self._writes += 1
+        self._write_order[filepath] = self._writes
+        
+        if rotate and self.keep_last > 0:
+            # File times are coarse; files written in the same tick keep their write order
+            paths = sorted(glob.glob(os.path.join(self.directory, rotate)),
+                           key=lambda path: (os.path.getmtime(path), self._write_order.get(path, 0)))
+            for path in paths[:-self.keep_last]:
+                os.remove(path)
+                self._write_order.pop(path, None)
@@ -0,0 +1,271 @@
+import os
+import queue
+import shutil
+import tempfile
+import time
+import numpy as np
+import torch
+import torch.multiprocessing as mp
+from torch.nn.utils import parameters_to_vector, vector_to_parameters
+
+from ml.dqn_agent import epsilon_greedy
+from ml.environment import VecCarEnvironment
+from ml.neural_network import QNetwork
+from ml.replay_buffer import NStepAccumulator
+from simulation.world import CollisionMap
+
+
+def run_actor(actor_id, config, transitions, weights, weights_version, weights_lock,
+              epsilon, stop_event):
+    """
+    Actor process: step a private environment and ship transitions to the learner.
+    
+    The actor keeps its own copy of the Q-network and reloads it from the
+    shared weight vector whenever the learner publishes a new version.
+    
+    Args:
+        actor_id (int): Index of this actor (offsets its random seed)
+        config (dict): map_path, cars_per_actor, env_options, chunk_steps,
+            state_size, action_size, hidden_sizes, dueling, n_step, gamma, seed
+        transitions (mp.Queue): Queue receiving transition chunks
+        weights (torch.Tensor): Shared flat parameter vector
+        weights_version (mp.Value): Incremented on every publish
+        weights_lock (mp.Lock): Guards reads/writes of the weight vector
+        epsilon (mp.Value): Shared exploration rate
+        stop_event (mp.Event): Set by the learner to shut actors down
+    """
+    # Actors are many; one intra-op thread each keeps them from oversubscribing cores
+    torch.set_num_threads(1)
+    
+    seed = config['seed'] + actor_id
+    rng = np.random.default_rng(seed)
+    env = VecCarEnvironment(config['map_path'], num_cars=config['cars_per_actor'],
+                            **config['env_options'])
+    network = QNetwork(config['state_size'], config['action_size'], config['hidden_sizes'], seed,
+                       dueling=config['dueling'])
+    network.eval()
+    version = -1
+    
+    chunk_steps = config['chunk_steps']
+    num_cars = env.num_cars
+    state_size = config['state_size']
+    
+    # n-step returns are formed here, where each car's steps arrive in order
+    accumulator = None
+    if config['n_step'] > 1:
+        accumulator = NStepAccumulator(num_cars, config['n_step'], config['gamma'], state_size)
+    all_cars = np.arange(num_cars)
+    
+    states = env.reset()
+    car_returns = np.zeros(num_cars)
+    
+    while not stop_event.is_set():
+        # Pick up freshly published weights
+        if weights_version.value != version:
+            with weights_lock:
+                version = weights_version.value
+                vector_to_parameters(weights, network.parameters())
+        
+        chunk_states = np.empty((chunk_steps, num_cars, state_size), dtype=np.float32)
+        chunk_next_states = np.empty_like(chunk_states)
+        chunk_actions = np.empty((chunk_steps, num_cars), dtype=np.int64)
+        chunk_rewards = np.empty((chunk_steps, num_cars), dtype=np.float32)
+        chunk_dones = np.empty((chunk_steps, num_cars), dtype=bool)
+        episode_returns = []
+        episode_distances = []
+        n_step_parts = []
+        
+        for t in range(chunk_steps):
+            with torch.no_grad():
+                action_values = network(torch.from_numpy(states)).numpy()
+            actions = epsilon_greedy(action_values, epsilon.value, rng)
+            next_states, rewards, dones, info = env.step(actions)
+            
+            chunk_states[t] = states
+            chunk_actions[t] = actions
+            chunk_rewards[t] = rewards
+            chunk_next_states[t] = info['terminal_states']
+            chunk_dones[t] = dones
+            
+            if accumulator is not None:
+                n_step_parts.append(accumulator.add(all_cars, states, actions, rewards,
+                                                    info['terminal_states'], dones))
+            
+            car_returns += rewards
+            if dones.any():
+                episode_returns.extend(car_returns[dones].tolist())
+                episode_distances.extend(info['distance'][dones].tolist())
+                car_returns[dones] = 0.0
+            
+            states = next_states
+        
+        if accumulator is None:
+            chunk = {
+                'states': chunk_states.reshape(-1, state_size),
+                'actions': chunk_actions.reshape(-1),
+                'rewards': chunk_rewards.reshape(-1),
+                'next_states': chunk_next_states.reshape(-1, state_size),
+                'dones': chunk_dones.reshape(-1),
+                'discounts': None,
+            }
+        else:
+            names = ('states', 'actions', 'rewards', 'next_states', 'dones', 'discounts')
+            chunk = {name: np.concatenate(parts) for name, parts in zip(names, zip(*n_step_parts))}
+        chunk['episode_returns'] = episode_returns
+        chunk['episode_distances'] = episode_distances
+        chunk['env_steps'] = chunk_steps * num_cars
+        
+        # Block while the learner is behind, but keep checking for shutdown
+        while not stop_event.is_set():
+            try:
+                transitions.put(chunk, timeout=0.1)
+                break
+            except queue.Full:
+                continue
+
+
+class ActorPool:
+    """
+    Pool of actor processes feeding a central learner.
+    
+    Actors run their own VecCarEnvironment and push transition chunks
+    through a bounded queue. The learner publishes Q-network weights into a
+    shared-memory parameter vector that actors poll between chunks.
+    
+    A map image is decoded once and saved as a memory-mappable
+    ``CollisionMap`` directory, so actors share one copy of the wall mask
+    and distance field instead of each decoding the image.
+    """
+    
+    def __init__(self, map_path, num_actors, cars_per_actor, network, chunk_steps=32, seed=42,
+                 env_options=None, n_step=1, gamma=0.99):
+        """
+        Initialize actor pool.
+        
+        Args:
+            map_path (str): Path to map image
+            num_actors (int): Number of actor processes
+            cars_per_actor (int): Cars simulated by each actor
+            network (QNetwork): Learner network whose weights are broadcast
+            chunk_steps (int): Environment steps per transition chunk
+            seed (int): Base random seed
+            env_options (dict): Extra keyword arguments for each actor's environment
+            n_step (int): Return horizon of the shipped transitions
+            gamma (float): Discount factor for n-step returns
+        """
+        self.num_actors = num_actors
+        self.cars_per_actor = cars_per_actor
+        
+        self._map_dir = None
+        if not os.path.isdir(map_path):
+            self._map_dir = tempfile.mkdtemp(prefix='collision-map-')
+            CollisionMap(map_path).save(self._map_dir)
+            map_path = self._map_dir
+        
+        # Spawn (not fork) so children never inherit the learner's torch thread pools
+        self.ctx = mp.get_context('spawn')
+        
+        self.weights = parameters_to_vector(network.parameters()).detach().cpu().clone()
+        self.weights.share_memory_()
+        self.weights_version = self.ctx.Value('l', 0)
+        self.weights_lock = self.ctx.Lock()
+        self.epsilon = self.ctx.Value('d', 1.0)
+        self.stop_event = self.ctx.Event()
+        self.transitions = self.ctx.Queue(maxsize=4 * num_actors)
+        
+        self.config = {
+            'map_path': map_path,
+            'cars_per_actor': cars_per_actor,
+            'env_options': env_options or {},
+            'chunk_steps': chunk_steps,
+            'state_size': network.state_size,
+            'action_size': network.action_size,
+            'hidden_sizes': network.hidden_sizes,
+            'dueling': network.dueling,
+            'n_step': n_step,
+            'gamma': gamma,
+            'seed': seed,
+        }
+        self.processes = []
+    
+    def start(self):
+        """Start all actor processes."""
+        for actor_id in range(self.num_actors):
+            process = self.ctx.Process(
+                target=run_actor,
+                args=(actor_id, self.config, self.transitions, self.weights,
+                      self.weights_version, self.weights_lock, self.epsilon, self.stop_event),
+                daemon=True
+            )
+            process.start()
+            self.processes.append(process)
+    
+    def get(self, timeout=None, poll_seconds=1.0):
+        """
+        Get the next transition chunk from any actor.
+        
+        While waiting, the actors are checked every ``poll_seconds``, so a
+        crashed actor surfaces as an error instead of a learner that waits
+        forever.
+        
+        Args:
+            timeout (float): Longest wait in seconds (None = no limit);
+                raises queue.Empty when it runs out
+            poll_seconds (float): Interval between checks of the actor processes
+        
+        Raises:
+            RuntimeError: If an actor process exited with an error
+        
+        Returns:
+            dict: states, actions, rewards, next_states, dones and discounts
+                arrays (discounts is None for one-step transitions), the
+                lists of episode_returns and episode_distances of the runs
+                finished within the chunk, and the chunk's env_steps
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = poll_seconds
+            if deadline is not None:
+                wait = min(wait, max(0.0, deadline - time.monotonic()))
+            try:
+                return self.transitions.get(timeout=wait)
+            except queue.Empty:
+                self._check_actors()
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise
+    
+    def _check_actors(self):
+        """Raise if any actor process has exited with an error."""
+        for actor_id, process in enumerate(self.processes):
+            if process.exitcode not in (None, 0):
+                raise RuntimeError(f"Actor {actor_id} exited with code {process.exitcode}")
+    
+    def publish(self, network):
+        """Broadcast the learner's current weights to all actors."""
+        with self.weights_lock:
+            self.weights.copy_(parameters_to_vector(network.parameters()).detach())
+            self.weights_version.value += 1
+    
+    def set_epsilon(self, epsilon):
+        """Set the exploration rate used by all actors."""
+        self.epsilon.value = epsilon
+    
+    def close(self):
+        """Stop all actors and release their resources."""
+        self.stop_event.set()
+        
+        # Drain so actors blocked on a full queue can exit
+        for process in self.processes:
+            while process.is_alive():
+                try:
+                    self.transitions.get(timeout=0.1)
+                except queue.Empty:
+                    process.join(timeout=0.1)
+        
+        for process in self.processes:
+            process.join()
+        self.processes = []
+        
+        if self._map_dir is not None:
+            shutil.rmtree(self._map_dir, ignore_errors=True)
+            self._map_dir = None
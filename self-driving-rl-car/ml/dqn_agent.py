@@ -2,50 +2,32 @@ import numpy as np
 import torch
 import torch.nn.functional as F
 import torch.optim as optim
-from collections import deque, namedtuple
 import random
+from contextlib import nullcontext
 
+from ml.checkpoint_writer import cpu_snapshot
+from ml.instrumentation import PhaseTimer
 from ml.neural_network import QNetwork
+from ml.replay_buffer import ReplayBuffer, PrioritizedReplayBuffer, MemmapReplayBuffer
 
 
-class ReplayBuffer:
-    """Experience Replay Buffer for storing and sampling transitions."""
+def epsilon_greedy(action_values, epsilons, rng):
+    """
+    Vectorized epsilon-greedy over a batch of Q-values.
     
-    def __init__(self, buffer_size, batch_size, seed=42):
-        """
-        Initialize replay buffer.
+    Args:
+        action_values (np.ndarray): Q-values of shape (N, action_size)
+        epsilons (float or np.ndarray): Exploration rate, scalar or per row
+        rng (np.random.Generator): Random generator
         
-        Args:
-            buffer_size (int): Maximum size of buffer
-            batch_size (int): Size of training batch
-            seed (int): Random seed
-        """
-        self.memory = deque(maxlen=buffer_size)
-        self.batch_size = batch_size
-        self.experience = namedtuple("Experience", 
-                                     field_names=["state", "action", "reward", "next_state", "done"])
-        random.seed(seed)
-        
-    def add(self, state, action, reward, next_state, done):
-        """Add a new experience to memory."""
-        e = self.experience(state, action, reward, next_state, done)
-        self.memory.append(e)
-        
-    def sample(self):
-        """Randomly sample a batch of experiences from memory."""
-        experiences = random.sample(self.memory, k=self.batch_size)
-        
-        states = torch.from_numpy(np.vstack([e.state for e in experiences if e is not None])).float()
-        actions = torch.from_numpy(np.vstack([e.action for e in experiences if e is not None])).long()
-        rewards = torch.from_numpy(np.vstack([e.reward for e in experiences if e is not None])).float()
-        next_states = torch.from_numpy(np.vstack([e.next_state for e in experiences if e is not None])).float()
-        dones = torch.from_numpy(np.vstack([e.done for e in experiences if e is not None]).astype(np.uint8)).float()
-        
-        return (states, actions, rewards, next_states, dones)
-    
-    def __len__(self):
-        """Return the current size of internal memory."""
-        return len(self.memory)
+    Returns:
+        np.ndarray: Selected actions, shape (N,)
+    """
+    n, action_size = action_values.shape
+    actions = action_values.argmax(axis=1)
+    explore = rng.random(n) < epsilons
+    actions[explore] = rng.integers(0, action_size, size=int(explore.sum()))
+    return actions
 
 
 class DQNAgent:
@@ -53,7 +35,10 @@ class DQNAgent:
     
     def __init__(self, state_size, action_size, hidden_sizes=[64, 64], 
                  buffer_size=100000, batch_size=64, gamma=0.99, 
-                 tau=0.001, lr=0.0005, update_every=4, seed=42):
+                 tau=0.001, lr=0.0005, update_every=4, seed=42,
+                 prioritized=False, per_alpha=0.6, per_beta=0.4, per_beta_steps=100000,
+                 double_dqn=False, dueling=False, target_update_every=0, updates_per_step=1,
+                 replay_dir=None):
         """
         Initialize DQN Agent.
         
@@ -68,6 +53,20 @@ class DQNAgent:
             lr (float): Learning rate
             update_every (int): How often to update the network
             seed (int): Random seed
+            prioritized (bool): Use prioritized experience replay
+            per_alpha (float): Priority exponent for prioritized replay
+            per_beta (float): Initial importance-sampling exponent for prioritized replay
+            per_beta_steps (int): Learning steps over which beta anneals to 1
+            double_dqn (bool): Pick next actions with the local network and
+                evaluate them with the target network (Double DQN targets)
+            dueling (bool): Use a dueling value/advantage Q-network head
+            target_update_every (int): If > 0, copy the local network into the
+                target network every this many learning steps instead of
+                soft-updating it after each one
+            updates_per_step (int): Gradient steps per update trigger (with
+                batch_size and update_every this sets the replay ratio)
+            replay_dir (str): Keep the replay buffer in memory-mapped files in
+                this directory (reopened, with its contents, if it exists)
         """
         self.state_size = state_size
         self.action_size = action_size
@@ -75,46 +74,151 @@ class DQNAgent:
         self.tau = tau
         self.batch_size = batch_size
         self.update_every = update_every
+        self.updates_per_step = updates_per_step
         self.seed = random.seed(seed)
+        self.rng = np.random.default_rng(seed)
+        self.double_dqn = double_dqn
         
         # Q-Network
         self.device = torch.device("cuda:0" if torch.cuda.is_available() else "cpu")
-        self.qnetwork_local = QNetwork(state_size, action_size, hidden_sizes, seed).to(self.device)
-        self.qnetwork_target = QNetwork(state_size, action_size, hidden_sizes, seed).to(self.device)
+        self.qnetwork_local = QNetwork(state_size, action_size, hidden_sizes, seed,
+                                       dueling=dueling).to(self.device)
+        self.qnetwork_target = QNetwork(state_size, action_size, hidden_sizes, seed,
+                                        dueling=dueling).to(self.device)
         self.optimizer = optim.Adam(self.qnetwork_local.parameters(), lr=lr)
         
+        # Network used for acting; an AsyncLearner swaps in a published copy
+        self.qnetwork_act = self.qnetwork_local
+        
+        # Target network updates: soft (every learn) or periodic hard syncs
+        self.target_update_every = target_update_every
+        self.learn_steps = 0
+        
+        # Loss summed over the updates since the last collect_loss()
+        self._loss_total = 0.0
+        self._loss_updates = 0
+        
         # Replay memory
-        self.memory = ReplayBuffer(buffer_size, batch_size, seed)
+        self.prioritized = prioritized
+        if prioritized and replay_dir is not None:
+            raise ValueError("Prioritized replay has no on-disk backend")
+        if replay_dir is not None:
+            self.memory = MemmapReplayBuffer(replay_dir, buffer_size, batch_size, state_size,
+                                             seed, gamma)
+        elif prioritized:
+            self.memory = PrioritizedReplayBuffer(buffer_size, batch_size, state_size, seed, gamma,
+                                                  alpha=per_alpha, beta=per_beta,
+                                                  beta_steps=per_beta_steps)
+        else:
+            self.memory = ReplayBuffer(buffer_size, batch_size, state_size, seed, gamma)
         
         # Initialize time step (for updating every UPDATE_EVERY steps)
         self.t_step = 0
         
+        # Phase timings (disabled unless a trainer installs an enabled timer)
+        self.timer = PhaseTimer()
+        
+        # Background learner (see AsyncLearner) and the locks it installs;
+        # without one, learning runs inline and the locks are no-ops
+        self.learner = None
+        self.memory_lock = nullcontext()   # replay memory
+        self.network_lock = nullcontext()  # local/target networks and optimizer
+        self.act_lock = nullcontext()      # acting network
+        
         # Epsilon for epsilon-greedy action selection
         self.epsilon = 1.0
         self.epsilon_min = 0.01
         self.epsilon_decay = 0.995
         
-    def step(self, state, action, reward, next_state, done):
+    def step(self, state, action, reward, next_state, done, discount=None):
         """
         Save experience in replay memory and learn if enough samples are available.
         
         Args:
             state: Current state
             action: Action taken
-            reward: Reward received
+            reward: Reward received (the n-step return for n-step transitions)
             next_state: Next state
             done: Whether episode is done
+            discount: Discount of the bootstrap value (None = gamma)
         """
         # Save experience in replay memory
-        self.memory.add(state, action, reward, next_state, done)
+        with self.timer.phase('replay_add'), self.memory_lock:
+            self.memory.add(state, action, reward, next_state, done, discount)
         
         # Learn every UPDATE_EVERY time steps
         self.t_step = (self.t_step + 1) % self.update_every
         if self.t_step == 0:
             # If enough samples are available in memory, get random subset and learn
             if len(self.memory) > self.batch_size:
-                experiences = self.memory.sample()
-                self.learn(experiences)
+                self._schedule_learning(self.updates_per_step)
+    
+    def step_batch(self, states, actions, rewards, next_states, dones, discounts=None):
+        """
+        Save a batch of experiences and run the updates that many calls to
+        step() would have triggered (updates_per_step per UPDATE_EVERY
+        transitions), all sampled in one draw.
+        
+        Args:
+            states, actions, rewards, next_states, dones: Arrays with a
+                leading batch axis
+            discounts: Per-transition bootstrap discounts (None = gamma)
+        """
+        with self.timer.phase('replay_add'), self.memory_lock:
+            self.memory.add_batch(states, actions, rewards, next_states, dones, discounts)
+        
+        total = self.t_step + len(actions)
+        self.t_step = total % self.update_every
+        triggers = total // self.update_every
+        if triggers and len(self.memory) > self.batch_size:
+            self._schedule_learning(triggers * self.updates_per_step)
+    
+    def _schedule_learning(self, num_updates):
+        """Learn now, or hand the updates to the background learner if one runs."""
+        if self.learner is not None:
+            self.learner.request(num_updates)
+        else:
+            self._learn_from_memory(num_updates)
+    
+    def _learn_from_memory(self, num_updates=1):
+        """
+        Sample minibatches from replay memory and take one gradient step on each.
+        
+        Several updates share one index draw, sliced into minibatches.
+        
+        Returns:
+            float: Mean loss over the updates
+        """
+        with self.timer.phase('replay_sample'), self.memory_lock:
+            if num_updates == 1:
+                batches = [self.memory.sample()]
+            else:
+                batches = self.memory.sample_batches(num_updates)
+        
+        loss = 0.0
+        for batch in batches:
+            if self.prioritized:
+                experiences, weights, indices = batch
+            else:
+                experiences, weights, indices = batch, None, None
+            loss += self.learn(experiences, weights, indices)
+        
+        self._loss_total += loss
+        self._loss_updates += num_updates
+        return loss / num_updates
+    
+    def collect_loss(self):
+        """
+        Mean loss of the updates since the last call, and reset it.
+        
+        Returns:
+            float: Mean loss, or None if no update ran in between
+        """
+        with self.network_lock:
+            total, updates = self._loss_total, self._loss_updates
+            self._loss_total = 0.0
+            self._loss_updates = 0
+        return total / updates if updates else None
                 
     def act(self, state, epsilon=None):
         """
@@ -132,10 +236,11 @@ class DQNAgent:
             
         state = torch.from_numpy(state).float().unsqueeze(0).to(self.device)
         
-        self.qnetwork_local.eval()
-        with torch.no_grad():
-            action_values = self.qnetwork_local(state)
-        self.qnetwork_local.train()
+        with self.act_lock:
+            self.qnetwork_act.eval()
+            with torch.no_grad():
+                action_values = self.qnetwork_act(state)
+            self.qnetwork_act.train()
         
         # Epsilon-greedy action selection
         if random.random() > epsilon:
@@ -143,41 +248,91 @@ class DQNAgent:
         else:
             return random.choice(np.arange(self.action_size))
             
-    def learn(self, experiences):
+    def act_batch(self, states, epsilons=None):
         """
-        Update value parameters using given batch of experience tuples.
+        Returns actions for a batch of states from one forward pass.
         
         Args:
-            experiences (Tuple[torch.Tensor]): Tuple of (s, a, r, s', done) tuples
+            states (np.ndarray): States of shape (N, state_size)
+            epsilons (float or np.ndarray): Exploration rate, scalar or one
+                per state (if None, uses self.epsilon)
+            
+        Returns:
+            np.ndarray: Selected actions, shape (N,)
         """
-        states, actions, rewards, next_states, dones = experiences
+        if epsilons is None:
+            epsilons = self.epsilon
         
-        # Move to device
-        states = states.to(self.device)
-        actions = actions.to(self.device)
-        rewards = rewards.to(self.device)
-        next_states = next_states.to(self.device)
-        dones = dones.to(self.device)
+        states = torch.from_numpy(np.asarray(states, dtype=np.float32)).to(self.device)
         
-        # Get max predicted Q values (for next states) from target model
-        Q_targets_next = self.qnetwork_target(next_states).detach().max(1)[0].unsqueeze(1)
+        # The network has no dropout/batch-norm, so no eval()/train() toggle is needed
+        with self.act_lock, torch.no_grad():
+            action_values = self.qnetwork_act(states)
         
-        # Compute Q targets for current states
-        Q_targets = rewards + (self.gamma * Q_targets_next * (1 - dones))
+        return epsilon_greedy(action_values.cpu().numpy(), epsilons, self.rng)
+    
+    def learn(self, experiences, weights=None, indices=None):
+        """
+        Update value parameters using given batch of experience tuples.
         
-        # Get expected Q values from local model
-        Q_expected = self.qnetwork_local(states).gather(1, actions)
+        Args:
+            experiences (Tuple[torch.Tensor]): Tuple of (s, a, r, s', done, discount) tuples
+            weights (torch.Tensor): Importance-sampling weights (prioritized replay)
+            indices (np.ndarray): Sampled transition indices whose priorities
+                are updated from the new TD errors (prioritized replay)
+        """
+        timer = self.timer
+        states, actions, rewards, next_states, dones, discounts = experiences
         
-        # Compute loss
-        loss = F.mse_loss(Q_expected, Q_targets)
+        with timer.phase('learn_forward'):
+            # Move to device
+            states = states.to(self.device)
+            actions = actions.to(self.device)
+            rewards = rewards.to(self.device)
+            next_states = next_states.to(self.device)
+            dones = dones.to(self.device)
+            discounts = discounts.to(self.device)
+            
+            with torch.no_grad():
+                if self.double_dqn:
+                    # Local model picks the next action, target model evaluates it
+                    next_actions = self.qnetwork_local(next_states).argmax(1, keepdim=True)
+                    Q_targets_next = self.qnetwork_target(next_states).gather(1, next_actions)
+                else:
+                    # Get max predicted Q values (for next states) from target model
+                    Q_targets_next = self.qnetwork_target(next_states).max(1)[0].unsqueeze(1)
+            
+            # Compute Q targets for current states (stored discount: gamma^n for n-step)
+            Q_targets = rewards + (discounts * Q_targets_next * (1 - dones))
+            
+            # Get expected Q values from local model
+            Q_expected = self.qnetwork_local(states).gather(1, actions)
+            
+            # Compute loss
+            if weights is None:
+                loss = F.mse_loss(Q_expected, Q_targets)
+            else:
+                td_errors = Q_targets - Q_expected
+                loss = (weights.to(self.device) * td_errors.pow(2)).mean()
+                if indices is not None:
+                    with self.memory_lock:
+                        self.memory.update_priorities(indices,
+                                                      td_errors.detach().squeeze(1).cpu().numpy())
         
         # Minimize the loss
-        self.optimizer.zero_grad()
-        loss.backward()
-        self.optimizer.step()
+        with timer.phase('learn_backward'):
+            self.optimizer.zero_grad()
+            loss.backward()
+        with timer.phase('learn_optimizer'):
+            self.optimizer.step()
         
         # Update target network
-        self.soft_update(self.qnetwork_local, self.qnetwork_target)
+        self.learn_steps += 1
+        with timer.phase('learn_target_update'):
+            if self.target_update_every <= 0:
+                self.soft_update(self.qnetwork_local, self.qnetwork_target)
+            elif self.learn_steps % self.target_update_every == 0:
+                self.hard_update(self.qnetwork_local, self.qnetwork_target)
         
         return loss.item()
         
@@ -190,26 +345,80 @@ class DQNAgent:
             local_model: PyTorch model (weights will be copied from)
             target_model: PyTorch model (weights will be copied to)
         """
-        for target_param, local_param in zip(target_model.parameters(), local_model.parameters()):
-            target_param.data.copy_(self.tau * local_param.data + (1.0 - self.tau) * target_param.data)
+        # θ_target += τ*(θ_local - θ_target), in place for all parameters in one fused call
+        with torch.no_grad():
+            torch._foreach_lerp_(list(target_model.parameters()), list(local_model.parameters()),
+                                 self.tau)
+    
+    def hard_update(self, local_model, target_model):
+        """
+        Copy model parameters: θ_target = θ_local.
+        
+        Args:
+            local_model: PyTorch model (weights will be copied from)
+            target_model: PyTorch model (weights will be copied to)
+        """
+        with torch.no_grad():
+            for target_param, local_param in zip(target_model.parameters(), local_model.parameters()):
+                target_param.copy_(local_param)
             
     def update_epsilon(self):
         """Decay epsilon for epsilon-greedy exploration."""
         self.epsilon = max(self.epsilon_min, self.epsilon * self.epsilon_decay)
         
+    def state_dict(self, training=False):
+        """
+        Weights, optimizer state and epsilon; with ``training=True`` also the
+        counters and sampling state a resumed run needs (``Trainer`` keeps
+        the replay transitions themselves in a separate directory).
+        
+        Tensors are copied to CPU under the network lock, so the result is a
+        consistent snapshot that can be serialized while training goes on.
+        """
+        with self.network_lock:
+            state = cpu_snapshot({
+                'qnetwork_local_state_dict': self.qnetwork_local.state_dict(),
+                'qnetwork_target_state_dict': self.qnetwork_target.state_dict(),
+                'optimizer_state_dict': self.optimizer.state_dict(),
+                'epsilon': self.epsilon
+            })
+        if training:
+            with self.memory_lock:
+                state.update(
+                    t_step=self.t_step,
+                    learn_steps=self.learn_steps,
+                    rng_state=self.rng.bit_generator.state,
+                    memory_state=self.memory.get_state(),
+                )
+        return state
+    
+    def load_state_dict(self, state):
+        """Restore ``state_dict`` (the training part only when present)."""
+        with self.network_lock:
+            self.qnetwork_local.load_state_dict(state['qnetwork_local_state_dict'])
+            self.qnetwork_target.load_state_dict(state['qnetwork_target_state_dict'])
+            self.optimizer.load_state_dict(state['optimizer_state_dict'])
+            if self.qnetwork_act is not self.qnetwork_local:
+                with self.act_lock:
+                    self.hard_update(self.qnetwork_local, self.qnetwork_act)
+        self.epsilon = state['epsilon']
+        
+        if 'memory_state' in state:
+            with self.memory_lock:
+                self.t_step = state['t_step']
+                self.learn_steps = state['learn_steps']
+                self.rng.bit_generator.state = state['rng_state']
+                self.memory.set_state(state['memory_state'])
+    
     def save(self, filepath):
         """Save model weights."""
-        torch.save({
-            'qnetwork_local_state_dict': self.qnetwork_local.state_dict(),
-            'qnetwork_target_state_dict': self.qnetwork_target.state_dict(),
-            'optimizer_state_dict': self.optimizer.state_dict(),
-            'epsilon': self.epsilon
-        }, filepath)
+        torch.save(self.state_dict(), filepath)
+        
+    def export(self, filepath):
+        """Export the local Q-network to a .npz for torch-free inference."""
+        with self.network_lock:
+            self.qnetwork_local.export(filepath)
         
     def load(self, filepath):
         """Load model weights."""
-        checkpoint = torch.load(filepath, map_location=self.device)
-        self.qnetwork_local.load_state_dict(checkpoint['qnetwork_local_state_dict'])
-        self.qnetwork_target.load_state_dict(checkpoint['qnetwork_target_state_dict'])
-        self.optimizer.load_state_dict(checkpoint['optimizer_state_dict'])
-        self.epsilon = checkpoint['epsilon']
+        self.load_state_dict(torch.load(filepath, map_location=self.device))
@@ -1,7 +1,10 @@
 import numpy as np
 import math
 from simulation.car import Car
+from simulation.car_batch import CarBatch
+from simulation.physics import CarPhysics
 from simulation.world import CollisionMap
+from ml.instrumentation import PhaseTimer
 
 
 class CarEnvironment:
@@ -20,7 +23,8 @@ class CarEnvironment:
         (0.0, 0.5),    # 4: Right (no throttle)
     ]
     
-    def __init__(self, map_path, num_cars=1, start_positions=None):
+    def __init__(self, map_path, num_cars=1, start_positions=None, footprint_collision=False,
+                 double_turn=True):
         """
         Initialize environment.
         
@@ -28,6 +32,10 @@ class CarEnvironment:
             map_path (str): Path to map image
             num_cars (int): Number of cars to train simultaneously
             start_positions (list): List of (angle, x, y) tuples for starting positions
+            footprint_collision (bool): Test the whole car footprint against
+                configuration-space maps instead of only its corners
+            double_turn (bool): Keep the original double angle update per tick
+                (see ``CarPhysics``)
         """
         self.collision_map = CollisionMap(map_path)
         self.num_cars = num_cars
@@ -38,11 +46,13 @@ class CarEnvironment:
         
         self.start_positions = start_positions
         
-        # Create cars
+        # Create cars (one shared physics engine)
+        self.physics = CarPhysics(double_turn=double_turn)
         self.cars = []
         for i in range(num_cars):
             angle, x, y = start_positions[i % len(start_positions)]
-            car = Car(self.collision_map, angle, x, y)
+            car = Car(self.collision_map, angle, x, y, footprint=footprint_collision,
+                      physics=self.physics)
             self.cars.append(car)
         
         # Track episode statistics
@@ -50,6 +60,9 @@ class CarEnvironment:
         self.episode_distances = [0.0] * num_cars
         self.prev_positions = [(car.x, car.y) for car in self.cars]
         
+        # Phase timings (disabled unless a trainer installs an enabled timer)
+        self.timer = PhaseTimer()
+        
     def reset(self, car_idx=None):
         """
         Reset environment for a specific car or all cars.
@@ -62,15 +75,13 @@ class CarEnvironment:
         """
         if car_idx is None:
             # Reset all cars
-            states = []
             for i, car in enumerate(self.cars):
                 angle, x, y = self.start_positions[i % len(self.start_positions)]
                 car.reset(angle, x, y)
                 self.episode_steps[i] = 0
                 self.episode_distances[i] = 0.0
                 self.prev_positions[i] = (car.x, car.y)
-                states.append(self._get_state(i))
-            return states
+            return list(self._get_states())
         else:
             # Reset specific car
             angle, x, y = self.start_positions[car_idx % len(self.start_positions)]
@@ -109,10 +120,12 @@ class CarEnvironment:
         self.episode_steps[car_idx] += 1
         
         # Get new state
-        next_state = self._get_state(car_idx)
+        with self.timer.phase('sensing'):
+            next_state = self._get_state(car_idx)
         
         # Calculate reward
-        reward, done = self._calculate_reward(car_idx, success, distance, car.speed)
+        with self.timer.phase('reward'):
+            reward, done = self._calculate_reward(car_idx, success, distance, car.speed)
         
         # Info dictionary
         info = {
@@ -133,25 +146,49 @@ class CarEnvironment:
         Returns:
             np.array: State vector [sensor1, sensor2, ..., sensor5, speed, sin(angle), cos(angle)]
         """
-        car = self.cars[car_idx]
-        
-        # Get sensor readings (5 sensors)
-        sensors = car.sensors()
-        
-        # Normalize sensors (0-200 range -> 0-1)
-        normalized_sensors = [s / 200.0 for s in sensors]
-        
-        # Normalize speed (0-5 range -> 0-1)
-        normalized_speed = car.speed / car.max_speed
-        
-        # Angle as sin/cos (already in -1 to 1 range)
-        angle_sin = math.sin(car.angle)
-        angle_cos = math.cos(car.angle)
+        return self._get_states([car_idx])[0]
+    
+    def _get_states(self, car_indices=None):
+        """
+        Get normalized states for several cars, casting all sensor rays at once.
         
-        # State vector: [5 sensors, speed, sin(angle), cos(angle)]
-        state = np.array(normalized_sensors + [normalized_speed, angle_sin, angle_cos], dtype=np.float32)
+        Readings are cached on each car until its next step or reset, so the
+        reward and the renderer reuse them instead of casting rays again.
         
-        return state
+        Args:
+            car_indices (list): Indices of cars (None = all cars)
+            
+        Returns:
+            np.array: States of shape (len(car_indices), 8)
+        """
+        if car_indices is None:
+            cars = self.cars
+        else:
+            cars = [self.cars[i] for i in car_indices]
+        
+        # Cast rays only for cars whose cached readings are stale, all in one call
+        stale = [car for car in cars if car.sensor_readings is None]
+        if stale:
+            xs = np.array([car.x for car in stale])
+            ys = np.array([car.y for car in stale])
+            stale_angles = np.array([car.angle for car in stale])
+            readings = self.collision_map.cast_rays(xs, ys, stale_angles[:, None] + Car.SENSOR_OFFSETS)
+            for car, reading in zip(stale, readings.tolist()):
+                car.sensor_readings = reading
+        
+        # Sensor readings for every car: (num_cars, 5)
+        sensors = np.array([car.sensor_readings for car in cars])
+        angles = np.array([car.angle for car in cars])
+        speeds = np.array([car.speed / car.max_speed for car in cars])
+        
+        # State vectors: [5 sensors (0-200 -> 0-1), speed (0-5 -> 0-1), sin(angle), cos(angle)]
+        states = np.empty((len(cars), 8), dtype=np.float32)
+        states[:, :5] = sensors / 200.0
+        states[:, 5] = speeds
+        states[:, 6] = np.sin(angles)
+        states[:, 7] = np.cos(angles)
+        
+        return states
     
     def _calculate_reward(self, car_idx, success, distance, speed):
         """
@@ -184,6 +221,7 @@ class CarEnvironment:
         reward += speed * 0.5
         
         # Check if sensors indicate good positioning (not too close to walls)
+        # (cached readings from _get_state, no second ray sweep)
         sensors = self.cars[car_idx].sensors()
         min_sensor = min(sensors)
         
@@ -214,3 +252,193 @@ class CarEnvironment:
     def get_all_cars(self):
         """Get all cars."""
         return self.cars
+
+
+class VecCarEnvironment:
+    """
+    Vectorized environment that steps all cars at once.
+    
+    Car state is kept as NumPy arrays (structure of arrays) in a CarBatch,
+    so physics, collision checks, sensing and rewards are computed for every
+    car in a handful of array operations. Cars that finish an episode are
+    reset automatically.
+    """
+    
+    ACTIONS = CarEnvironment.ACTIONS
+    
+    def __init__(self, map_path, num_cars=1, start_positions=None, max_episode_steps=1000,
+                 footprint_collision=False, double_turn=True):
+        """
+        Initialize environment.
+        
+        Args:
+            map_path (str): Path to map image
+            num_cars (int): Number of cars to simulate
+            start_positions (list): List of (angle, x, y) tuples for starting positions
+            max_episode_steps (int): Steps after which an episode times out
+            footprint_collision (bool): Test the whole car footprint against
+                configuration-space maps instead of only its corners
+            double_turn (bool): Keep the original double angle update per tick
+                (see ``CarPhysics``)
+        """
+        self.collision_map = CollisionMap(map_path)
+        self.num_cars = num_cars
+        self.max_episode_steps = max_episode_steps
+        
+        # Default starting positions
+        if start_positions is None:
+            start_positions = [(math.pi / 2, 120, 120)] * num_cars
+        
+        self.start_positions = start_positions
+        starts = np.array([start_positions[i % len(start_positions)] for i in range(num_cars)],
+                          dtype=np.float64)
+        self.start_angles = starts[:, 0]
+        self.start_xs = starts[:, 1]
+        self.start_ys = starts[:, 2]
+        
+        self.cars = CarBatch(self.collision_map, num_cars, footprint=footprint_collision,
+                             double_turn=double_turn)
+        self._actions = np.array(self.ACTIONS, dtype=np.float64)
+        
+        # Track episode statistics
+        self.episode_steps = np.zeros(num_cars, dtype=np.int64)
+        self.episode_distances = np.zeros(num_cars)
+        
+        # Sensor readings of the current poses, shared by states, rewards and rendering
+        self.sensors = None
+        
+        # Phase timings (disabled unless a trainer installs an enabled timer)
+        self.timer = PhaseTimer()
+        
+        self.reset()
+        
+    def reset(self, mask=None):
+        """
+        Reset all cars or the cars selected by a boolean mask.
+        
+        Args:
+            mask (np.ndarray): Cars to reset (None = reset all)
+            
+        Returns:
+            np.array: States of all cars, shape (num_cars, 8)
+        """
+        if mask is None:
+            mask = np.ones(self.num_cars, dtype=bool)
+        
+        self.cars.reset(mask, self.start_angles[mask], self.start_xs[mask], self.start_ys[mask])
+        self.episode_steps[mask] = 0
+        self.episode_distances[mask] = 0.0
+        
+        # Only the reset cars need a new sensor sweep
+        if self.sensors is None or mask.all():
+            self.sensors = self.cars.sensors()
+        else:
+            self.sensors[mask] = self.cars.sensors(mask)
+        
+        return self._get_states(self.sensors)
+    
+    def step(self, actions):
+        """
+        Execute one step for every car.
+        
+        Args:
+            actions (np.ndarray): Action index per car, shape (num_cars,)
+            
+        Returns:
+            tuple: (next_states, rewards, dones, info)
+                next_states: (num_cars, 8); rows of finished cars already hold
+                    the state after auto-reset
+                rewards: (num_cars,) float
+                dones: (num_cars,) bool
+                info: dict of per-car arrays 'distance', 'steps', 'speed' for
+                    the step just taken, and 'terminal_states' holding the
+                    true next states before auto-reset
+        """
+        cars = self.cars
+        controls = self._actions[np.asarray(actions, dtype=np.int64)]
+        
+        prev_x, prev_y = cars.x.copy(), cars.y.copy()
+        
+        # Execute actions
+        success = cars.step(controls[:, 0], controls[:, 1])
+        
+        # Distance traveled this step
+        distance = np.hypot(cars.x - prev_x, cars.y - prev_y)
+        self.episode_distances += distance
+        self.episode_steps += 1
+        
+        # One sensor sweep serves both the states and the reward
+        with self.timer.phase('sensing'):
+            sensors = cars.sensors()
+            self.sensors = sensors
+            next_states = self._get_states(sensors)
+        with self.timer.phase('reward'):
+            rewards, dones = self._calculate_rewards(success, distance, cars.speed, sensors)
+        
+        info = {
+            'distance': self.episode_distances.copy(),
+            'steps': self.episode_steps.copy(),
+            'speed': cars.speed.copy(),
+            'terminal_states': next_states.copy(),
+        }
+        
+        # Auto-reset finished cars
+        if dones.any():
+            next_states[dones] = self.reset(dones)[dones]
+        
+        return next_states, rewards, dones, info
+    
+    def _get_states(self, sensors):
+        """
+        Build normalized states for all cars from their sensor readings.
+        
+        Args:
+            sensors (np.ndarray): Sensor distances, shape (num_cars, 5)
+            
+        Returns:
+            np.array: States [5 sensors, speed, sin(angle), cos(angle)], shape (num_cars, 8)
+        """
+        cars = self.cars
+        states = np.empty((self.num_cars, 8), dtype=np.float32)
+        states[:, :5] = sensors / 200.0
+        states[:, 5] = cars.speed / cars.max_speed
+        states[:, 6] = np.sin(cars.angle)
+        states[:, 7] = np.cos(cars.angle)
+        return states
+    
+    def _calculate_rewards(self, success, distance, speed, sensors):
+        """
+        Vectorized CarEnvironment._calculate_reward.
+        
+        Args:
+            success (np.ndarray): Whether each car moved without collision
+            distance (np.ndarray): Distance traveled this step
+            speed (np.ndarray): Current speed
+            sensors (np.ndarray): Sensor distances, shape (num_cars, 5)
+            
+        Returns:
+            tuple: (rewards, dones)
+        """
+        min_sensor = sensors.min(axis=1)
+        
+        rewards = 0.1 + distance * 2.0 + speed * 0.5
+        rewards += np.where(min_sensor > 50, 0.5, np.where(min_sensor < 20, -0.3, 0.0))
+        dones = self.episode_steps > self.max_episode_steps
+        
+        # Collision penalty
+        rewards[~success] = -10.0
+        dones |= ~success
+        
+        return rewards, dones
+    
+    def get_state_size(self):
+        """Get the size of the state space."""
+        return 8  # 5 sensors + speed + sin(angle) + cos(angle)
+    
+    def get_action_size(self):
+        """Get the size of the action space."""
+        return len(self.ACTIONS)
+    
+    def get_all_cars(self):
+        """Get a snapshot of all cars as Car objects (for rendering)."""
+        return self.cars.to_cars(self.sensors)
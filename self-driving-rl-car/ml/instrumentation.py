@@ -0,0 +1,105 @@
+import json
+import time
+
+
+class _Phase:
+    """Reusable context manager that accumulates time spent in one phase."""
+    
+    __slots__ = ('calls', 'total', '_start')
+    
+    def __init__(self):
+        self.calls = 0
+        self.total = 0.0
+        self._start = 0.0
+    
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.total += time.perf_counter() - self._start
+        self.calls += 1
+        return False
+
+
+class _NullPhase:
+    """Context manager that does nothing; shared by every disabled phase."""
+    
+    __slots__ = ()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_PHASE = _NullPhase()
+
+
+class PhaseTimer:
+    """
+    Low-overhead per-phase counters and timers for the training loop.
+    
+    Code under measurement wraps each phase in ``with timer.phase(name):``.
+    Enabled, a phase costs two perf_counter calls; disabled, ``phase`` hands
+    back one shared no-op context manager, so the instrumentation can stay
+    in place in production runs.
+    """
+    
+    def __init__(self, enabled=False, output_path=None):
+        """
+        Initialize phase timer.
+        
+        Args:
+            enabled (bool): Whether to record timings
+            output_path (str): Optional JSONL file receiving one line per
+                collected interval (e.g. per episode)
+        """
+        self.enabled = enabled
+        self.output_path = output_path
+        self._phases = {}
+    
+    def phase(self, name):
+        """
+        Context manager timing one occurrence of a phase.
+        
+        Args:
+            name (str): Phase name
+        """
+        if not self.enabled:
+            return _NULL_PHASE
+        
+        phase = self._phases.get(name)
+        if phase is None:
+            phase = self._phases[name] = _Phase()
+        return phase
+    
+    def collect(self, **fields):
+        """
+        Return the timings accumulated since the last collect and reset them.
+        
+        If an output path is set, the timings are also appended to it as one
+        JSON line together with ``fields`` (e.g. the episode number).
+        
+        Returns:
+            dict: phase name -> {'calls': int, 'ms': float}
+        """
+        stats = {
+            name: {'calls': phase.calls, 'ms': phase.total * 1000.0}
+            for name, phase in self._phases.items() if phase.calls
+        }
+        for phase in self._phases.values():
+            phase.calls = 0
+            phase.total = 0.0
+        
+        if self.output_path and stats:
+            with open(self.output_path, 'a') as f:
+                f.write(json.dumps(dict(fields, phases=stats)) + '\n')
+        
+        return stats
+    
+    @staticmethod
+    def format(stats):
+        """Format collected timings as a compact one-line summary."""
+        return " | ".join(f"{name} {entry['ms']:.1f}ms" for name, entry in stats.items())
@@ -0,0 +1,179 @@
+import csv
+import io
+import json
+import os
+import time
+
+
+class MetricsLogger:
+    """
+    Append-only per-episode metrics file with buffered writes.
+    
+    Records are kept in a small in-memory buffer and appended to the file
+    every ``flush_every`` records or ``flush_seconds`` seconds, whichever
+    comes first, so a run of any length holds at most one buffer of history
+    and a crash loses at most that much. The format follows the extension:
+    ``.csv`` writes a header once and then one row per record, anything else
+    writes one JSON object per line. A new logger starts the file over
+    unless ``append`` is set (e.g. on ``--resume``).
+    """
+    
+    def __init__(self, path, flush_every=10, flush_seconds=5.0, append=False):
+        """
+        Initialize metrics logger.
+        
+        Args:
+            path (str): Output file (.jsonl or .csv)
+            flush_every (int): Records buffered before they are written
+            flush_seconds (float): Longest time a record waits in the buffer
+            append (bool): Continue an existing file instead of truncating it
+        """
+        self.path = path
+        self.flush_every = flush_every
+        self.flush_seconds = flush_seconds
+        self.is_csv = path.endswith('.csv')
+        
+        self._buffer = []
+        self._last_flush = time.monotonic()
+        self._columns = None
+        
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        if not append:
+            open(path, 'w').close()
+        
+        # Appending to an existing CSV keeps the column order of its header
+        if self.is_csv and os.path.exists(path) and os.path.getsize(path) > 0:
+            with open(path, newline='') as f:
+                self._columns = next(csv.reader(f))
+    
+    def log(self, **fields):
+        """
+        Buffer one record (e.g. one episode) and flush if due.
+        
+        Args:
+            **fields: Values to record (numbers, strings or None)
+        """
+        self._buffer.append(fields)
+        if (len(self._buffer) >= self.flush_every or
+                time.monotonic() - self._last_flush >= self.flush_seconds):
+            self.flush()
+    
+    def flush(self):
+        """Append the buffered records to the file."""
+        self._last_flush = time.monotonic()
+        if not self._buffer:
+            return
+        
+        if self.is_csv:
+            text = self._format_csv(self._buffer)
+        else:
+            text = ''.join(json.dumps(record) + '\n' for record in self._buffer)
+        
+        with open(self.path, 'a', newline='') as f:
+            f.write(text)
+        self._buffer.clear()
+    
+    def _format_csv(self, records):
+        out = io.StringIO()
+        header = self._columns is None
+        if header:
+            self._columns = list(records[0])
+        
+        writer = csv.DictWriter(out, fieldnames=self._columns, extrasaction='ignore',
+                                lineterminator='\n')
+        if header:
+            writer.writeheader()
+        writer.writerows(records)
+        return out.getvalue()
+    
+    def close(self):
+        """Flush what is still buffered."""
+        self.flush()
+
+
+def _parse_csv_value(value):
+    """CSV cell back to int, float or None (empty cell); other text stays a string."""
+    if value == '':
+        return None
+    for cast in (int, float):
+        try:
+            return cast(value)
+        except ValueError:
+            pass
+    return value
+
+
+def read_metrics(path, follow=False, poll_seconds=1.0):
+    """
+    Stream the records of a metrics file, one dict at a time.
+    
+    Only complete lines are yielded, so a file that is still being written
+    can be read safely. Memory use does not grow with the file.
+    
+    Args:
+        path (str): File written by MetricsLogger (.jsonl or .csv)
+        follow (bool): Keep waiting for new records at the end of the file
+            (like ``tail -f``) instead of stopping
+        poll_seconds (float): Wait between checks for new records when following
+    
+    Yields:
+        dict: One record per episode
+    """
+    is_csv = path.endswith('.csv')
+    columns = None
+    partial = ''
+    
+    with open(path, newline='') as f:
+        while True:
+            line = f.readline()
+            if not line:
+                if not follow:
+                    return
+                time.sleep(poll_seconds)
+                continue
+            
+            # Partial line: wait until the writer finishes it
+            line = partial + line
+            if not line.endswith('\n'):
+                partial = line
+                if not follow:
+                    return
+                continue
+            partial = ''
+            
+            if not line.strip():
+                continue
+            if not is_csv:
+                yield json.loads(line)
+            elif columns is None:
+                columns = next(csv.reader([line]))
+            else:
+                values = next(csv.reader([line]))
+                yield {name: _parse_csv_value(value) for name, value in zip(columns, values)}
+
+
+def trim_metrics(path, last_episode):
+    """
+    Drop the records after ``last_episode`` from a metrics file.
+    
+    Used when resuming from a checkpoint, so episodes that ran after it in
+    the interrupted run are not listed twice. The file is streamed into a
+    temporary copy that then replaces it.
+    
+    Args:
+        path (str): File written by MetricsLogger (.jsonl or .csv)
+        last_episode (int): Last episode to keep
+    """
+    base, ext = os.path.splitext(path)
+    tmp_path = base + '.tmp' + ext
+    
+    logger = MetricsLogger(tmp_path)
+    for record in read_metrics(path):
+        if record['episode'] <= last_episode:
+            logger.log(**record)
+    logger.close()
+    
+    os.replace(tmp_path, path)
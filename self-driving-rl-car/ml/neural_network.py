@@ -1,15 +1,48 @@
+import numpy as np
 import torch
 import torch.nn as nn
 import torch.nn.functional as F
 
 
+def export_npz(state_dict, filepath):
+    """
+    Write QNetwork weights to a compact .npz for ``NumpyQNetwork``.
+    
+    The layer layout is read from the state dict itself (hidden layers in
+    order, then either the output layer or the dueling value/advantage
+    heads), so no network configuration is needed.
+    
+    Args:
+        state_dict (dict): QNetwork state dict (e.g. a checkpoint's
+            qnetwork_local_state_dict)
+        filepath (str): Output .npz path
+    """
+    layers = sorted({int(key.split('.')[1]) for key in state_dict if key.startswith('network.')})
+    
+    arrays = {}
+    for i, layer in enumerate(layers):
+        arrays[f'weight_{i}'] = state_dict[f'network.{layer}.weight'].detach().cpu().numpy()
+        arrays[f'bias_{i}'] = state_dict[f'network.{layer}.bias'].detach().cpu().numpy()
+    
+    dueling = 'value.weight' in state_dict
+    if dueling:
+        for head in ('value', 'advantage'):
+            arrays[f'{head}_weight'] = state_dict[f'{head}.weight'].detach().cpu().numpy()
+            arrays[f'{head}_bias'] = state_dict[f'{head}.bias'].detach().cpu().numpy()
+    
+    np.savez(filepath, dueling=np.array(dueling), num_layers=np.array(len(layers)), **arrays)
+
+
 class QNetwork(nn.Module):
     """
     Q-Network for Deep Q-Learning.
     Maps state to Q-values for each action.
+    
+    With ``dueling=True`` the last hidden layer feeds separate value and
+    advantage heads, combined as Q = V + A - mean(A).
     """
     
-    def __init__(self, state_size, action_size, hidden_sizes=[64, 64], seed=42):
+    def __init__(self, state_size, action_size, hidden_sizes=[64, 64], seed=42, dueling=False):
         """
         Initialize Q-Network.
         
@@ -18,12 +51,15 @@ class QNetwork(nn.Module):
             action_size (int): Dimension of action space
             hidden_sizes (list): List of hidden layer sizes
             seed (int): Random seed
+            dueling (bool): Use a dueling value/advantage head
         """
         super(QNetwork, self).__init__()
         torch.manual_seed(seed)
         
         self.state_size = state_size
         self.action_size = action_size
+        self.hidden_sizes = list(hidden_sizes)
+        self.dueling = dueling
         
         # Build network layers
         layers = []
@@ -34,10 +70,15 @@ class QNetwork(nn.Module):
             layers.append(nn.ReLU())
             input_size = hidden_size
         
-        # Output layer
-        layers.append(nn.Linear(input_size, action_size))
-        
-        self.network = nn.Sequential(*layers)
+        if dueling:
+            # Value and advantage streams on top of the shared trunk
+            self.network = nn.Sequential(*layers)
+            self.value = nn.Linear(input_size, 1)
+            self.advantage = nn.Linear(input_size, action_size)
+        else:
+            # Output layer
+            layers.append(nn.Linear(input_size, action_size))
+            self.network = nn.Sequential(*layers)
         
     def forward(self, state):
         """
@@ -49,4 +90,13 @@ class QNetwork(nn.Module):
         Returns:
             torch.Tensor: Q-values for each action
         """
-        return self.network(state)
+        if not self.dueling:
+            return self.network(state)
+        
+        features = self.network(state)
+        advantage = self.advantage(features)
+        return self.value(features) + advantage - advantage.mean(dim=-1, keepdim=True)
+    
+    def export(self, filepath):
+        """Write the weights to a .npz for torch-free inference (see ``export_npz``)."""
+        export_npz(self.state_dict(), filepath)
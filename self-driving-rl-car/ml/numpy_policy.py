@@ -0,0 +1,67 @@
+import numpy as np
+
+
+class NumpyQNetwork:
+    """
+    Pure-NumPy forward pass of an exported QNetwork, for inference only.
+    
+    Loads the .npz written by ``export_npz``/``QNetwork.export``: a few
+    small float32 matrices and no optimizer, target network or replay
+    buffer. Does not import torch.
+    """
+    
+    def __init__(self, filepath):
+        """
+        Load exported weights.
+        
+        Args:
+            filepath (str): Path to the .npz file
+        """
+        with np.load(filepath) as data:
+            num_layers = int(data['num_layers'])
+            self.dueling = bool(data['dueling'])
+            
+            # Stored as (out, in) like nn.Linear; kept transposed for x @ W
+            self.layers = [
+                (np.ascontiguousarray(data[f'weight_{i}'].T), data[f'bias_{i}'])
+                for i in range(num_layers)
+            ]
+            if self.dueling:
+                self.value = (np.ascontiguousarray(data['value_weight'].T), data['value_bias'])
+                self.advantage = (np.ascontiguousarray(data['advantage_weight'].T),
+                                  data['advantage_bias'])
+        
+        self.state_size = self.layers[0][0].shape[0]
+        if self.dueling:
+            self.action_size = self.advantage[0].shape[1]
+        else:
+            self.action_size = self.layers[-1][0].shape[1]
+    
+    def __call__(self, states):
+        """
+        Q-values for a state or a batch of states.
+        
+        Args:
+            states (np.ndarray): Shape (state_size,) or (N, state_size)
+            
+        Returns:
+            np.ndarray: Q-values, shape (action_size,) or (N, action_size)
+        """
+        x = np.asarray(states, dtype=np.float32)
+        
+        # Hidden layers use ReLU; without dueling the last layer is the output
+        hidden = self.layers if self.dueling else self.layers[:-1]
+        for weight, bias in hidden:
+            x = np.maximum(x @ weight + bias, 0.0)
+        
+        if not self.dueling:
+            weight, bias = self.layers[-1]
+            return x @ weight + bias
+        
+        advantage = x @ self.advantage[0] + self.advantage[1]
+        value = x @ self.value[0] + self.value[1]
+        return value + advantage - advantage.mean(axis=-1, keepdims=True)
+    
+    def act(self, state):
+        """Greedy action for one state."""
+        return int(np.argmax(self(state)))
@@ -0,0 +1,671 @@
+import json
+import os
+import uuid
+import numpy as np
+import torch
+
+
+# Field name -> (per-transition shape suffix, dtype); layout of on-disk replay directories
+REPLAY_FIELDS = {
+    'states': (True, np.float32),
+    'next_states': (True, np.float32),
+    'actions': (False, np.uint8),
+    'rewards': (False, np.float32),
+    'dones': (False, np.uint8),
+    'discounts': (False, np.float32),
+}
+
+
+def open_replay_files(directory, buffer_size, state_size, mode):
+    """
+    Open (mode 'r+') or create (mode 'w+') the .npy memmaps of a replay directory.
+    
+    Returns:
+        dict: Field name -> np.memmap
+    """
+    arrays = {}
+    for name, (per_state, dtype) in REPLAY_FIELDS.items():
+        shape = (buffer_size, state_size) if per_state else (buffer_size,)
+        arrays[name] = np.lib.format.open_memmap(
+            os.path.join(directory, name + '.npy'), mode=mode, dtype=dtype,
+            shape=shape if mode == 'w+' else None
+        )
+    return arrays
+
+
+def read_replay_meta(directory):
+    """Metadata of a replay directory, or None if it has none yet."""
+    try:
+        with open(os.path.join(directory, 'replay.json')) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def write_replay_meta(directory, buffer_size, state_size, position, size, added=None, run_id=None):
+    """
+    Write replay directory metadata atomically (temp file + rename).
+    
+    ``added`` and ``run_id`` identify which buffer history the rows belong
+    to, so a later save can tell whether writing only newer rows is enough.
+    """
+    # The rename is atomic, so readers never see a half-written file
+    meta_path = os.path.join(directory, 'replay.json')
+    with open(meta_path + '.tmp', 'w') as f:
+        json.dump({
+            'buffer_size': buffer_size,
+            'state_size': state_size,
+            'position': position,
+            'size': size,
+            'added': added,
+            'run_id': run_id,
+        }, f)
+    os.replace(meta_path + '.tmp', meta_path)
+
+
+class ReplayBuffer:
+    """
+    Experience Replay Buffer for storing and sampling transitions.
+    
+    Transitions live in preallocated NumPy arrays used as a ring buffer:
+    contiguous float32 state/next_state arrays plus compact action, reward,
+    done and discount arrays. Sampling gathers a random index array, so
+    building a batch costs O(batch_size) with no per-sample Python work.
+    
+    Each transition stores the discount applied to its bootstrap value:
+    gamma for one-step transitions, gamma^n for n-step ones.
+    """
+    
+    def __init__(self, buffer_size, batch_size, state_size, seed=42, gamma=0.99):
+        """
+        Initialize replay buffer.
+        
+        Args:
+            buffer_size (int): Maximum size of buffer
+            batch_size (int): Size of training batch
+            state_size (int): Dimension of state space
+            seed (int): Random seed
+            gamma (float): Discount stored when a transition comes without one
+        """
+        self.buffer_size = buffer_size
+        self.batch_size = batch_size
+        
+        self.states = np.zeros((buffer_size, state_size), dtype=np.float32)
+        self.next_states = np.zeros((buffer_size, state_size), dtype=np.float32)
+        self.actions = np.zeros(buffer_size, dtype=np.uint8)
+        self.rewards = np.zeros(buffer_size, dtype=np.float32)
+        self.dones = np.zeros(buffer_size, dtype=np.uint8)
+        self.discounts = np.zeros(buffer_size, dtype=np.float32)
+        self.gamma = gamma
+        
+        self.position = 0  # Next slot to write
+        self.size = 0
+        self.rng = np.random.default_rng(seed)
+        
+        # Transitions ever added and an id of this buffer's history; saved
+        # replay directories record both, which makes incremental saves safe
+        self.added = 0
+        self.run_id = uuid.uuid4().hex
+    
+    def add(self, state, action, reward, next_state, done, discount=None):
+        """Add a new experience to memory."""
+        i = self.position
+        self.states[i] = state
+        self.actions[i] = action
+        self.rewards[i] = reward
+        self.next_states[i] = next_state
+        self.dones[i] = done
+        self.discounts[i] = self.gamma if discount is None else discount
+        
+        self.position = (i + 1) % self.buffer_size
+        self.size = min(self.size + 1, self.buffer_size)
+        self.added += 1
+    
+    def add_batch(self, states, actions, rewards, next_states, dones, discounts=None):
+        """Add a batch of experiences (arrays with a leading batch axis) to memory."""
+        idx = (self.position + np.arange(len(actions))) % self.buffer_size
+        self.states[idx] = states
+        self.actions[idx] = actions
+        self.rewards[idx] = rewards
+        self.next_states[idx] = next_states
+        self.dones[idx] = dones
+        self.discounts[idx] = self.gamma if discounts is None else discounts
+        
+        self.position = (self.position + len(actions)) % self.buffer_size
+        self.size = min(self.size + len(actions), self.buffer_size)
+        self.added += len(actions)
+    
+    def sample(self):
+        """Randomly sample a batch of experiences (with replacement) from memory."""
+        idx = self.rng.integers(0, self.size, size=self.batch_size)
+        return self._gather(idx)
+    
+    def sample_batches(self, num_batches):
+        """
+        Sample several minibatches from one index draw and one gather.
+        
+        Returns:
+            list: num_batches experience tuples of batch_size transitions each
+                (slices of a single gathered batch)
+        """
+        idx = self.rng.integers(0, self.size, size=num_batches * self.batch_size)
+        return self._split(self._gather(idx), num_batches)
+    
+    def _split(self, tensors, num_batches):
+        """Slice a tuple of batched tensors into num_batches consecutive minibatches."""
+        b = self.batch_size
+        return [tuple(t[i * b:(i + 1) * b] for t in tensors) for i in range(num_batches)]
+    
+    def _gather(self, idx):
+        """Build the (s, a, r, s', done, discount) tensor tuple for the given indices."""
+        take = self._take
+        states = torch.from_numpy(take(self.states, idx))
+        actions = torch.from_numpy(take(self.actions, idx).astype(np.int64)).unsqueeze(1)
+        rewards = torch.from_numpy(take(self.rewards, idx)).unsqueeze(1)
+        next_states = torch.from_numpy(take(self.next_states, idx))
+        dones = torch.from_numpy(take(self.dones, idx).astype(np.float32)).unsqueeze(1)
+        discounts = torch.from_numpy(take(self.discounts, idx)).unsqueeze(1)
+        
+        return (states, actions, rewards, next_states, dones, discounts)
+    
+    @staticmethod
+    def _take(array, idx):
+        """Rows of ``array`` at ``idx``."""
+        return array[idx]
+    
+    def flush(self):
+        """Persist buffered state (no-op for in-memory buffers)."""
+    
+    def prepare_flush(self):
+        """
+        Capture what ``flush`` would persist now and return a function writing it.
+        
+        The function may run later on another thread (see CheckpointWriter.call)
+        while transitions keep being added.
+        """
+        return self.flush
+    
+    def save(self, directory):
+        """Write the transitions to a replay directory; see ``prepare_save``."""
+        self.prepare_save(directory)()
+    
+    def prepare_save(self, directory):
+        """
+        Snapshot the transitions for a replay directory (the MemmapReplayBuffer layout).
+        
+        If the directory already holds an earlier state of this same buffer
+        (same run id, fewer than buffer_size transitions behind), only the
+        rows added since then are written, so periodic checkpoints of a
+        large buffer cost about as much as the experience collected in
+        between. Otherwise the files are rewritten from scratch.
+        
+        The rows are updated in place: callers that need the previous save
+        to survive an interrupted one alternate between two directories.
+        
+        The rows to write are copied here; the returned function writes them
+        and may run later on another thread (see CheckpointWriter.call).
+        
+        Args:
+            directory (str): Target directory (created if missing)
+        
+        Returns:
+            callable: Function without arguments that writes the snapshot
+        """
+        os.makedirs(directory, exist_ok=True)
+        buffer_size = self.buffer_size
+        state_size = self.states.shape[1]
+        
+        meta = read_replay_meta(directory)
+        incremental = (meta is not None and meta.get('run_id') == self.run_id and
+                       meta['buffer_size'] == self.buffer_size and meta['state_size'] == state_size and
+                       meta['added'] <= self.added < meta['added'] + self.buffer_size)
+        if incremental:
+            new = self.added - meta['added']
+            rows = (self.position - new + np.arange(new)) % buffer_size
+        else:
+            rows = np.arange(self.size)
+        
+        # Ascending rows, so the files are written front to back
+        rows = np.sort(rows)
+        values = {name: getattr(self, name)[rows] for name in REPLAY_FIELDS}
+        meta = (self.position, self.size, self.added, self.run_id)
+        
+        def write():
+            files = open_replay_files(directory, buffer_size, state_size,
+                                      'r+' if incremental else 'w+')
+            for name, array in files.items():
+                array[rows] = values[name]
+                array.flush()
+            del files
+            write_replay_meta(directory, buffer_size, state_size, *meta)
+        
+        return write
+    
+    def load(self, directory):
+        """
+        Read the transitions written by ``save`` (or a MemmapReplayBuffer directory).
+        
+        The buffer takes over the directory's history (run id and count of
+        added transitions), so saving back to it afterwards is incremental.
+        
+        Args:
+            directory (str): Replay directory
+        """
+        meta = read_replay_meta(directory)
+        state_size = self.states.shape[1]
+        if meta is None or meta['buffer_size'] != self.buffer_size or meta['state_size'] != state_size:
+            raise ValueError(f"{directory} does not hold a {self.buffer_size} x {state_size} replay buffer")
+        
+        files = open_replay_files(directory, self.buffer_size, state_size, 'r+')
+        rows = np.arange(meta['size'])
+        for name, array in files.items():
+            getattr(self, name)[rows] = array[rows]
+        del files
+        
+        self.position = meta['position']
+        self.size = meta['size']
+        self._restore_history(meta)
+    
+    def _restore_history(self, meta):
+        """Continue the run id and added count recorded in a directory's metadata."""
+        if meta.get('run_id') is not None:
+            self.added = meta['added']
+            self.run_id = meta['run_id']
+    
+    def get_state(self):
+        """Sampling state that the transition files do not hold (for checkpoints)."""
+        return {'rng': self.rng.bit_generator.state}
+    
+    def set_state(self, state):
+        """Restore ``get_state``."""
+        self.rng.bit_generator.state = state['rng']
+    
+    def __len__(self):
+        """Return the current size of internal memory."""
+        return self.size
+
+
+class MemmapReplayBuffer(ReplayBuffer):
+    """
+    Replay buffer whose arrays are ``numpy.memmap`` files in a directory.
+    
+    Capacity is bounded by disk rather than RAM; the OS pages in only the
+    rows a batch touches. Each gather reads its rows in ascending order so
+    neighbouring samples share pages and reads run forward through the
+    files. ``flush`` records the write position and size, and opening the
+    same directory again continues from there, so a restarted run can
+    learn from the experience collected before it.
+    """
+    
+    def __init__(self, directory, buffer_size, batch_size, state_size, seed=42, gamma=0.99):
+        """
+        Open or create an on-disk replay buffer.
+        
+        Args:
+            directory (str): Directory holding the .npy files (created if missing)
+            buffer_size (int): Maximum size of buffer
+            batch_size (int): Size of training batch
+            state_size (int): Dimension of state space
+            seed (int): Random seed
+            gamma (float): Discount stored when a transition comes without one
+        """
+        super().__init__(0, batch_size, state_size, seed, gamma)
+        self.buffer_size = buffer_size
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        
+        meta = read_replay_meta(directory)
+        if meta is not None and (meta['buffer_size'] != buffer_size or
+                                 meta['state_size'] != state_size):
+            raise ValueError(
+                f"Replay directory {directory} holds a buffer of {meta['buffer_size']} x "
+                f"{meta['state_size']}, not {buffer_size} x {state_size}"
+            )
+        
+        files = open_replay_files(directory, buffer_size, state_size,
+                                  'r+' if meta is not None else 'w+')
+        for name, array in files.items():
+            setattr(self, name, array)
+        
+        if meta is not None:
+            self.position = meta['position']
+            self.size = meta['size']
+            self._restore_history(meta)
+        else:
+            self.flush()
+    
+    @staticmethod
+    def _take(array, idx):
+        """Rows at ``idx``, read in ascending file order and returned in ``idx`` order."""
+        order = np.argsort(idx, kind='stable')
+        rows = array[idx[order]]
+        out = np.empty_like(rows)
+        out[order] = rows
+        return out
+    
+    def flush(self):
+        """Write dirty pages and the write position/size so the buffer can be reopened."""
+        self.prepare_flush()()
+    
+    def prepare_flush(self):
+        """
+        Capture the write position/size now; the returned function writes
+        the dirty pages and then that metadata.
+        """
+        arrays = [getattr(self, name) for name in REPLAY_FIELDS]
+        args = (self.directory, self.buffer_size, self.states.shape[1],
+                self.position, self.size, self.added, self.run_id)
+        
+        def flush():
+            for array in arrays:
+                array.flush()
+            write_replay_meta(*args)
+        
+        return flush
+    
+    def prepare_save(self, directory):
+        """Flush in place when saving to the buffer's own directory, else copy."""
+        if os.path.abspath(directory) == os.path.abspath(self.directory):
+            return self.prepare_flush()
+        return super().prepare_save(directory)
+    
+    def load(self, directory):
+        """Reopening the buffer's own directory already restored it; else copy."""
+        if os.path.abspath(directory) != os.path.abspath(self.directory):
+            super().load(directory)
+
+
+class SumTree:
+    """
+    Array-based binary sum tree over transition priorities.
+    
+    Leaves hold priorities, every inner node holds the sum of its children,
+    so the root is the total priority. The capacity is rounded up to a power
+    of two so all leaves sit on the same level; lookups and updates walk one
+    level per iteration, vectorized across a whole batch (O(log n) each).
+    """
+    
+    def __init__(self, capacity):
+        """
+        Initialize sum tree.
+        
+        Args:
+            capacity (int): Number of leaves (transitions) to index
+        """
+        self.depth = max(1, int(np.ceil(np.log2(capacity))))
+        self.num_leaves = 2 ** self.depth
+        self.tree = np.zeros(2 * self.num_leaves - 1, dtype=np.float64)
+    
+    @property
+    def total(self):
+        """Sum of all priorities."""
+        return self.tree[0]
+    
+    def update(self, data_indices, priorities):
+        """
+        Set leaf priorities and refresh the sums above them.
+        
+        Args:
+            data_indices (np.ndarray): Transition indices
+            priorities (np.ndarray): New priorities for those transitions
+        """
+        nodes = np.asarray(data_indices, dtype=np.int64) + self.num_leaves - 1
+        self.tree[nodes] = priorities
+        
+        for _ in range(self.depth):
+            nodes = np.unique((nodes - 1) // 2)
+            self.tree[nodes] = self.tree[2 * nodes + 1] + self.tree[2 * nodes + 2]
+    
+    def find(self, values):
+        """
+        Find the leaves whose cumulative priority ranges contain ``values``.
+        
+        Args:
+            values (np.ndarray): Points in [0, total)
+        
+        Returns:
+            np.ndarray: Transition indices
+        """
+        values = np.array(values, dtype=np.float64)
+        nodes = np.zeros(len(values), dtype=np.int64)
+        
+        for _ in range(self.depth):
+            left = 2 * nodes + 1
+            left_sum = self.tree[left]
+            go_right = values >= left_sum
+            values = np.where(go_right, values - left_sum, values)
+            nodes = np.where(go_right, left + 1, left)
+        
+        return nodes - (self.num_leaves - 1)
+    
+    def get(self, data_indices):
+        """Priorities of the given transitions."""
+        return self.tree[np.asarray(data_indices, dtype=np.int64) + self.num_leaves - 1]
+
+
+class PrioritizedReplayBuffer(ReplayBuffer):
+    """
+    Prioritized experience replay (Schaul et al., 2016).
+    
+    Transitions are sampled with probability proportional to
+    priority^alpha, where the priority is the last absolute TD error.
+    Rare, surprising transitions such as crashes are replayed far more often
+    than under uniform sampling; importance-sampling weights correct the
+    resulting bias, annealed from beta to 1 over training.
+    """
+    
+    def __init__(self, buffer_size, batch_size, state_size, seed=42, gamma=0.99,
+                 alpha=0.6, beta=0.4, beta_steps=100000, epsilon=1e-5):
+        """
+        Initialize prioritized replay buffer.
+        
+        Args:
+            buffer_size (int): Maximum size of buffer
+            batch_size (int): Size of training batch
+            state_size (int): Dimension of state space
+            seed (int): Random seed
+            gamma (float): Discount stored when a transition comes without one
+            alpha (float): How strongly priorities shape sampling (0 = uniform)
+            beta (float): Initial importance-sampling exponent
+            beta_steps (int): Number of samples over which beta anneals to 1
+            epsilon (float): Added to TD errors so no priority is zero
+        """
+        super().__init__(buffer_size, batch_size, state_size, seed, gamma)
+        self.tree = SumTree(buffer_size)
+        self.alpha = alpha
+        self.beta = beta
+        self.beta_increment = (1.0 - beta) / max(1, beta_steps)
+        self.epsilon = epsilon
+        self.max_priority = 1.0
+    
+    def add(self, state, action, reward, next_state, done, discount=None):
+        """Add a new experience to memory with the highest priority seen so far."""
+        i = self.position
+        super().add(state, action, reward, next_state, done, discount)
+        self.tree.update([i], [self.max_priority])
+    
+    def add_batch(self, states, actions, rewards, next_states, dones, discounts=None):
+        """Add a batch of experiences with the highest priority seen so far."""
+        idx = (self.position + np.arange(len(actions))) % self.buffer_size
+        super().add_batch(states, actions, rewards, next_states, dones, discounts)
+        self.tree.update(idx, np.full(len(idx), self.max_priority))
+    
+    def sample(self):
+        """
+        Sample a batch proportionally to priority (stratified over the total).
+        
+        Returns:
+            tuple: (experiences, weights, indices) where experiences is the
+                usual (s, a, r, s', done, discount) tuple, weights is a (batch, 1)
+                tensor of importance-sampling weights and indices identifies
+                the transitions for update_priorities
+        """
+        return self.sample_batches(1)[0]
+    
+    def sample_batches(self, num_batches):
+        """
+        Sample several prioritized minibatches from one stratified draw.
+        
+        All minibatches see the priorities as they are now; priorities
+        updated by learning on earlier minibatches take effect on the next
+        draw.
+        
+        Returns:
+            list: num_batches (experiences, weights, indices) tuples as
+                returned by sample
+        """
+        n = num_batches * self.batch_size
+        total = self.tree.total
+        segment = total / n
+        values = (np.arange(n) + self.rng.random(n)) * segment
+        idx = self.tree.find(np.minimum(values, np.nextafter(total, 0)))
+        idx = np.minimum(idx, self.size - 1)
+        if num_batches > 1:
+            # Spread every stratum over all minibatches
+            idx = idx[self.rng.permutation(n)]
+        
+        # Importance-sampling weights, normalized by each minibatch's maximum
+        probs = self.tree.get(idx) / total
+        weights = ((self.size * probs) ** (-self.beta)).reshape(num_batches, self.batch_size)
+        weights /= weights.max(axis=1, keepdims=True)
+        self.beta = min(1.0, self.beta + num_batches * self.beta_increment)
+        
+        weights = torch.from_numpy(weights.reshape(-1).astype(np.float32)).unsqueeze(1)
+        
+        experiences = self._split(self._gather(idx), num_batches)
+        weights = self._split((weights,), num_batches)
+        b = self.batch_size
+        return [(experiences[i], weights[i][0], idx[i * b:(i + 1) * b]) for i in range(num_batches)]
+    
+    def get_state(self):
+        """Sampling state plus priorities, beta and the running max priority."""
+        state = super().get_state()
+        state.update(
+            priorities=self.tree.get(np.arange(self.buffer_size)),
+            beta=self.beta,
+            max_priority=self.max_priority,
+        )
+        return state
+    
+    def set_state(self, state):
+        """Restore ``get_state``."""
+        if 'priorities' not in state:
+            raise ValueError("Checkpoint was saved without prioritized replay; "
+                             "resume without --prioritized or start a new run")
+        super().set_state(state)
+        self.tree.update(np.arange(self.buffer_size), state['priorities'])
+        self.beta = state['beta']
+        self.max_priority = state['max_priority']
+    
+    def update_priorities(self, indices, td_errors):
+        """
+        Update priorities from the TD errors of a learning step.
+        
+        Args:
+            indices (np.ndarray): Transition indices returned by sample
+            td_errors (np.ndarray): TD errors for those transitions
+        """
+        priorities = (np.abs(td_errors) + self.epsilon) ** self.alpha
+        self.tree.update(indices, priorities)
+        self.max_priority = max(self.max_priority, float(priorities.max()))
+
+
+class NStepAccumulator:
+    """
+    Turns one-step transitions of many concurrent cars into n-step transitions.
+    
+    Each car keeps a window of its last n (state, action) pairs together
+    with their running discounted returns. Once a window is full its oldest
+    entry leaves as (s_t, a_t, R_n, s_{t+n}, done, gamma^n). When a car's
+    episode ends, every pending entry leaves with the terminal next state,
+    done=True and the discount of its shorter horizon, and the window is
+    emptied. Windows are stored per car as arrays, so all cars of a
+    vectorized step are handled at once.
+    """
+    
+    def __init__(self, num_cars, n_step, gamma, state_size):
+        """
+        Initialize accumulator.
+        
+        Args:
+            num_cars (int): Number of concurrent cars (independent windows)
+            n_step (int): Return horizon n
+            gamma (float): Discount factor
+            state_size (int): Dimension of state space
+        """
+        self.num_cars = num_cars
+        self.n_step = n_step
+        self.gamma = gamma
+        
+        self.states = np.zeros((num_cars, n_step, state_size), dtype=np.float32)
+        self.actions = np.zeros((num_cars, n_step), dtype=np.int64)
+        self.returns = np.zeros((num_cars, n_step), dtype=np.float64)
+        self.discounts = np.ones((num_cars, n_step), dtype=np.float64)
+        
+        self.start = np.zeros(num_cars, dtype=np.int64)  # Oldest pending slot
+        self.count = np.zeros(num_cars, dtype=np.int64)  # Pending entries
+    
+    def add(self, cars, states, actions, rewards, next_states, dones):
+        """
+        Record one step for the given cars and return the finished n-step transitions.
+        
+        Args:
+            cars (np.ndarray): Distinct car indices, shape (B,)
+            states, actions, rewards, next_states, dones: One-step
+                transitions of those cars, leading axis B
+        
+        Returns:
+            tuple: (states, actions, returns, next_states, dones, discounts)
+                arrays of the emitted transitions (possibly empty)
+        """
+        cars = np.asarray(cars, dtype=np.int64)
+        rewards = np.asarray(rewards, dtype=np.float64)
+        dones = np.asarray(dones, dtype=bool)
+        next_states = np.asarray(next_states, dtype=np.float32)
+        
+        # Append the new step to each car's window
+        slot = (self.start[cars] + self.count[cars]) % self.n_step
+        self.states[cars, slot] = states
+        self.actions[cars, slot] = actions
+        self.returns[cars, slot] = 0.0
+        self.discounts[cars, slot] = 1.0
+        self.count[cars] += 1
+        
+        # Every pending entry of these cars collects the reward
+        offsets = (np.arange(self.n_step) - self.start[cars, None]) % self.n_step
+        pending = offsets < self.count[cars, None]
+        returns = self.returns[cars]
+        discounts = self.discounts[cars]
+        returns[pending] += (discounts * rewards[:, None])[pending]
+        discounts[pending] *= self.gamma
+        self.returns[cars] = returns
+        self.discounts[cars] = discounts
+        
+        # Full windows emit their oldest entry; finished episodes emit everything
+        emit = np.zeros_like(pending)
+        full = (self.count[cars] == self.n_step) & ~dones
+        emit[full, self.start[cars[full]]] = True
+        emit[dones] = pending[dones]
+        
+        rows, slots = np.nonzero(emit)
+        emitted_cars = cars[rows]
+        out = (
+            self.states[emitted_cars, slots],
+            self.actions[emitted_cars, slots],
+            self.returns[emitted_cars, slots].astype(np.float32),
+            next_states[rows],
+            dones[rows],
+            self.discounts[emitted_cars, slots].astype(np.float32),
+        )
+        
+        self.start[cars[full]] = (self.start[cars[full]] + 1) % self.n_step
+        self.count[cars[full]] -= 1
+        self.start[cars[dones]] = 0
+        self.count[cars[dones]] = 0
+        
+        return out
+    
+    def reset(self):
+        """Drop all pending entries (e.g. when every episode restarts)."""
+        self.start[:] = 0
+        self.count[:] = 0
@@ -1,11 +1,15 @@
 import math
-import pygame
-from pygame.math import Vector2
+import numpy as np
 from simulation.world import CollisionMap
+from simulation.physics import CarPhysics
 
 
 class Car:
-    def __init__(self,map,angle=0, x=0.0, y=0.0,length = 30,witdh =20):
+    # Sensör yönleri, aracın açısına göre (ileri, ±45°, ±90°)
+    SENSOR_OFFSETS = np.array([0.0, math.pi / 4, -math.pi / 4, math.pi / 2, -math.pi / 2])
+
+    def __init__(self,map,angle=0, x=0.0, y=0.0,length = 30,witdh =20, footprint=False,
+                 double_turn=True, physics=None):
         self.x = x
         self.y = y
         self.angle = angle
@@ -17,101 +21,64 @@ class Car:
 
         self.map = map
 
+        # footprint=True: tüm gövde, önceden hesaplanmış konfigürasyon uzayı haritasıyla test edilir
+        self.collider = map.footprint_collider(length, witdh) if footprint else None
 
-        self.friction = 0.05 
-        self.max_speed = 5.0
-        self.vertical_acc = 0.2
-        self.angular_acc = 0.2
-
-        self.angular_speed = 0.0
-        self.max_angular_speed = math.radians(6)   # ≈ 0.105 rad
-        self.angular_acc = math.radians(1.0)        # ≈ 0.017 rad
-        self.angular_friction = 0.25
-
-    def step(self, dikey, acisal):
-        old_x = self.x
-        old_y = self.y
-        old_angle = self.angle
-
-        # 🚗 Gaz / fren
-        self.speed += dikey * self.vertical_acc
-        self.speed = max(0, min(self.max_speed, self.speed))
-
-        if abs(dikey) < 1e-3:
-            self.speed *= (1 - self.friction)
-
-        if abs(self.speed) < 0.01:
-            self.speed = 0.0
-
-        # 🔄 Açısal hareket (π ile oranlama + min/max)
-        self.angular_speed += (acisal * self.angular_acc) / (2 * math.pi)
-
-        self.angular_speed = max(
-            -self.max_angular_speed,
-            min(self.max_angular_speed, self.angular_speed)
-        )
+        # Fizik motoru CarBatch ile ortak; sabitler oradan okunur
+        self.physics = physics if physics is not None else CarPhysics(double_turn=double_turn)
 
-        if abs(acisal) < 1e-3:
-            self.angular_speed *= (1 - self.angular_friction)
+        self.friction = self.physics.friction
+        self.max_speed = self.physics.max_speed
+        self.vertical_acc = self.physics.vertical_acc
 
-        if abs(self.angular_speed) < 0.001:
-            self.angular_speed = 0.0
-
-        self.angle += self.angular_speed
-
-        self.angle += self.angular_speed
+        self.angular_speed = 0.0
+        self.max_angular_speed = self.physics.max_angular_speed   # ≈ 0.105 rad
+        self.angular_acc = self.physics.angular_acc               # ≈ 0.017 rad
+        self.angular_friction = self.physics.angular_friction
 
-        # 📍 Pozisyon güncelle
-        self.x += self.speed * math.cos(self.angle)
-        self.y += self.speed * math.sin(self.angle)
+        # Mevcut poz için sensör okumaları; poz değişince None (geçersiz)
+        self.sensor_readings = None
 
-        # 🧱 Çarpışma kontrolü
-        if self.isitinwall():
-            self.x = old_x
-            self.y = old_y
-            self.angle = old_angle
-            self.speed = 0.0
-            self.angular_speed = 0.0
-            return False
+    def step(self, dikey, acisal):
+        self.sensor_readings = None
+        return self.physics.step_one(self, dikey, acisal)
 
-        return True
 
 
+    def sensor_angles(self):
+        return self.angle + self.SENSOR_OFFSETS
 
     def sensors(self):
-        angles = [
-            self.angle,                
-            self.angle + math.pi / 4,
-            self.angle - math.pi / 4,
-            self.angle + math.pi / 2,
-            self.angle - math.pi / 2
-        ]
-
-        distances = []
+        if self.sensor_readings is None:
+            distances = self.map.cast_rays(self.x, self.y, self.sensor_angles())
+            self.sensor_readings = distances.tolist()
 
-        for a in angles:
-            d = self.map.cast_ray(self.x, self.y, a)
-            distances.append(d)
-
-        return distances 
+        return self.sensor_readings
 
 
     def isitinwall(self):
+        if self.collider is not None:
+            return self.collider.collides_one(self.x, self.y, self.angle)
+
         half_l = self.length / 2
         half_w = self.witdh / 2
 
-        forward = Vector2(math.cos(self.angle), math.sin(self.angle))
-        right   = Vector2(-math.sin(self.angle), math.cos(self.angle))
+        cos_a = math.cos(self.angle)
+        sin_a = math.sin(self.angle)
 
-        corners = [
-            Vector2(self.x, self.y) + forward * half_l + right * half_w,
-            Vector2(self.x, self.y) + forward * half_l - right * half_w,
-            Vector2(self.x, self.y) - forward * half_l + right * half_w,
-            Vector2(self.x, self.y) - forward * half_l - right * half_w,
-        ]
+        # forward = (cos, sin), right = (-sin, cos); ara nesne (Vector2) yok
+        fx, fy = cos_a * half_l, sin_a * half_l
+        rx, ry = -sin_a * half_w, cos_a * half_w
 
-        for c in corners:
-            if self.map.is_wall(c.x, c.y):
+        corners = (
+            (self.x + fx + rx, self.y + fy + ry),
+            (self.x + fx - rx, self.y + fy - ry),
+            (self.x - fx + rx, self.y - fy + ry),
+            (self.x - fx - rx, self.y - fy - ry),
+        )
+
+        for cx, cy in corners:
+            if self.map.is_wall(cx, cy):
                 return True
 
         return False
@@ -131,4 +98,5 @@ class Car:
         self.y = y
         self.angle = angle
         self.speed = 0.0
-        self.angular_speed = 0.0
\ No newline at end of file
+        self.angular_speed = 0.0
+        self.sensor_readings = None
\ No newline at end of file
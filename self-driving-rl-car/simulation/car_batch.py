@@ -0,0 +1,111 @@
+import numpy as np
+from simulation.car import Car
+
+
+class CarBatch:
+    """
+    Structure-of-arrays version of ``Car`` for stepping many cars at once.
+
+    State lives in flat NumPy arrays (x, y, angle, speed, angular_speed);
+    ``step`` applies exactly the physics of ``Car.step`` to every car.
+    """
+
+    def __init__(self, map, num_cars, angle=0, x=0.0, y=0.0, length=30, witdh=20, footprint=False,
+                 double_turn=True, physics=None):
+        self.map = map
+        self.num_cars = num_cars
+
+        # Physics constants and engine come from one place: Car / CarPhysics
+        template = Car(map, angle, x, y, length, witdh, footprint, double_turn, physics)
+        self.physics = template.physics
+        self.collider = template.collider
+        self.length = template.length
+        self.witdh = template.witdh
+        self.max_speed = template.max_speed
+
+        self.x = np.full(num_cars, float(x))
+        self.y = np.full(num_cars, float(y))
+        self.angle = np.full(num_cars, float(angle))
+        self.speed = np.zeros(num_cars)
+        self.angular_speed = np.zeros(num_cars)
+
+    def step(self, dikey, acisal):
+        """
+        Advance all cars by one tick.
+
+        Args:
+            dikey (np.ndarray): Throttle per car, shape (N,)
+            acisal (np.ndarray): Steering per car, shape (N,)
+
+        Returns:
+            np.ndarray: Boolean mask, False where the car hit a wall
+        """
+        return self.physics.step(self, dikey, acisal)
+
+    def isitinwall(self):
+        """``Car.isitinwall`` for all cars; returns a boolean mask."""
+        if self.collider is not None:
+            return self.collider.collides(self.x, self.y, self.angle)
+
+        half_l = self.length / 2
+        half_w = self.witdh / 2
+
+        cos_a = np.cos(self.angle)
+        sin_a = np.sin(self.angle)
+
+        # forward = (cos, sin), right = (-sin, cos)
+        fx, fy = cos_a * half_l, sin_a * half_l
+        rx, ry = -sin_a * half_w, cos_a * half_w
+
+        corners_x = np.stack([self.x + fx + rx, self.x + fx - rx,
+                              self.x - fx + rx, self.x - fx - rx])
+        corners_y = np.stack([self.y + fy + ry, self.y + fy - ry,
+                              self.y - fy + ry, self.y - fy - ry])
+
+        return self.map.walls_at(corners_x, corners_y).any(axis=0)
+
+    def sensors(self, mask=None):
+        """
+        Sensor distances, shape (N, len(Car.SENSOR_OFFSETS)).
+
+        Args:
+            mask (np.ndarray): Only sense the selected cars (None = all cars)
+        """
+        if mask is None:
+            return self.map.cast_rays(self.x, self.y, self.angle[:, None] + Car.SENSOR_OFFSETS)
+
+        return self.map.cast_rays(self.x[mask], self.y[mask],
+                                  self.angle[mask][:, None] + Car.SENSOR_OFFSETS)
+
+    def reset(self, mask, angle, x, y):
+        """
+        Reset the cars selected by ``mask``.
+
+        Args:
+            mask (np.ndarray): Boolean mask or index array of cars to reset
+            angle, x, y: Start pose, scalars or arrays matching the selection
+        """
+        self.x[mask] = x
+        self.y[mask] = y
+        self.angle[mask] = angle
+        self.speed[mask] = 0.0
+        self.angular_speed[mask] = 0.0
+
+    def to_cars(self, sensors=None):
+        """
+        Snapshot the batch as ``Car`` objects (for rendering).
+
+        Args:
+            sensors (np.ndarray): Readings of the current poses, shape (N, K);
+                stored as each car's cached readings when given
+        """
+        cars = []
+        for i in range(self.num_cars):
+            car = Car(self.map, self.angle[i], self.x[i], self.y[i], self.length, self.witdh,
+                      self.collider is not None, physics=self.physics)
+            car.speed = self.speed[i]
+            car.angular_speed = self.angular_speed[i]
+            if sensors is not None:
+                car.sensor_readings = sensors[i].tolist()
+            cars.append(car)
+        return cars
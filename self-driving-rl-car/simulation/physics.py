@@ -0,0 +1,214 @@
+import importlib.util
+import math
+import numpy as np
+
+# Numba is only imported (and the kernel compiled) on the first batched
+# advance, so importing the simulation stays light for scalar Car users
+HAVE_NUMBA = importlib.util.find_spec("numba") is not None
+_advance_jit = None
+
+
+def _advance_scalar(x, y, angle, speed, angular_speed, dikey, acisal,
+                    friction, max_speed, vertical_acc, max_angular_speed, angular_acc,
+                    angular_friction, turns):
+    """One tick of car dynamics for one car (no collision test)."""
+    # Throttle / brake
+    speed += dikey * vertical_acc
+    speed = max(0.0, min(max_speed, speed))
+
+    if abs(dikey) < 1e-3:
+        speed *= (1 - friction)
+
+    if abs(speed) < 0.01:
+        speed = 0.0
+
+    # Steering (scaled by 2π, then clamped)
+    angular_speed += (acisal * angular_acc) / (2 * math.pi)
+    angular_speed = max(-max_angular_speed, min(max_angular_speed, angular_speed))
+
+    if abs(acisal) < 1e-3:
+        angular_speed *= (1 - angular_friction)
+
+    if abs(angular_speed) < 0.001:
+        angular_speed = 0.0
+
+    # Original behaviour: the angle is updated twice (turns=2), as two separate additions
+    for _ in range(turns):
+        angle += angular_speed
+
+    # Position update
+    x += speed * math.cos(angle)
+    y += speed * math.sin(angle)
+
+    return x, y, angle, speed, angular_speed
+
+
+def _numba_kernel():
+    """The compiled batched advance, built on first use."""
+    global _advance_jit
+    if _advance_jit is None:
+        import numba
+
+        advance_one = numba.njit(cache=True)(_advance_scalar)
+
+        @numba.njit(cache=True)
+        def advance(x, y, angle, speed, angular_speed, dikey, acisal,
+                    friction, max_speed, vertical_acc, max_angular_speed, angular_acc,
+                    angular_friction, turns):
+            for i in range(x.shape[0]):
+                x[i], y[i], angle[i], speed[i], angular_speed[i] = advance_one(
+                    x[i], y[i], angle[i], speed[i], angular_speed[i], dikey[i], acisal[i],
+                    friction, max_speed, vertical_acc, max_angular_speed, angular_acc,
+                    angular_friction, turns
+                )
+
+        _advance_jit = advance
+    return _advance_jit
+
+
+class CarPhysics:
+    """
+    Car dynamics shared by ``Car`` (one car) and ``CarBatch`` (many cars).
+
+    ``advance`` updates flat state arrays in place with one compiled loop
+    when Numba is installed and a handful of NumPy operations otherwise;
+    ``advance_one`` is the same update on Python floats. ``step`` and
+    ``step_one`` add the collision test and roll hit cars back, exactly
+    as ``Car.step`` always has.
+
+    ``Car.step`` historically adds the angular speed to the angle twice per
+    tick. That stays the default so trained models keep their dynamics;
+    ``double_turn=False`` applies it once.
+    """
+
+    def __init__(self, friction=0.05, max_speed=5.0, vertical_acc=0.2,
+                 max_angular_speed=math.radians(6), angular_acc=math.radians(1.0),
+                 angular_friction=0.25, double_turn=True, backend="auto"):
+        """
+        Args:
+            friction (float): Speed lost per tick without throttle (fraction)
+            max_speed (float): Speed limit in pixels per tick
+            vertical_acc (float): Speed gained per tick at full throttle
+            max_angular_speed (float): Turn rate limit in radians per tick
+            angular_acc (float): Turn rate gained per tick at full steering
+            angular_friction (float): Turn rate lost per tick without steering (fraction)
+            double_turn (bool): Keep the original double angle update
+            backend (str): "numba", "numpy" or "auto" (Numba when installed)
+        """
+        if backend not in ("auto", "numba", "numpy"):
+            raise ValueError(f"Unknown physics backend: {backend}")
+        if backend == "numba" and not HAVE_NUMBA:
+            raise ValueError("Physics backend 'numba' requested but numba is not installed")
+
+        self.friction = friction
+        self.max_speed = max_speed
+        self.vertical_acc = vertical_acc
+        self.max_angular_speed = max_angular_speed
+        self.angular_acc = angular_acc
+        self.angular_friction = angular_friction
+        self.double_turn = double_turn
+        self.turns = 2 if double_turn else 1
+        if backend == "auto":
+            backend = "numba" if HAVE_NUMBA else "numpy"
+        self.backend = backend
+
+        self._constants = (friction, max_speed, vertical_acc, max_angular_speed, angular_acc,
+                           angular_friction, self.turns)
+
+    def advance_one(self, x, y, angle, speed, angular_speed, dikey, acisal):
+        """
+        Advance one car by one tick, without the collision test.
+
+        Returns:
+            tuple: New (x, y, angle, speed, angular_speed)
+        """
+        return _advance_scalar(x, y, angle, speed, angular_speed, dikey, acisal, *self._constants)
+
+    def advance(self, x, y, angle, speed, angular_speed, dikey, acisal):
+        """
+        Advance many cars by one tick in place, without the collision test.
+
+        Args:
+            x, y, angle, speed, angular_speed (np.ndarray): float64 state arrays, shape (N,)
+            dikey, acisal (np.ndarray): Throttle and steering per car, shape (N,)
+        """
+        dikey = np.asarray(dikey, dtype=np.float64)
+        acisal = np.asarray(acisal, dtype=np.float64)
+
+        if self.backend == "numba":
+            _numba_kernel()(x, y, angle, speed, angular_speed, dikey, acisal, *self._constants)
+            return
+
+        # Throttle / brake
+        speed += dikey * self.vertical_acc
+        np.clip(speed, 0.0, self.max_speed, out=speed)
+        speed[np.abs(dikey) < 1e-3] *= (1 - self.friction)
+        speed[np.abs(speed) < 0.01] = 0.0
+
+        # Steering
+        angular_speed += (acisal * self.angular_acc) / (2 * math.pi)
+        np.clip(angular_speed, -self.max_angular_speed, self.max_angular_speed, out=angular_speed)
+        angular_speed[np.abs(acisal) < 1e-3] *= (1 - self.angular_friction)
+        angular_speed[np.abs(angular_speed) < 0.001] = 0.0
+
+        for _ in range(self.turns):
+            angle += angular_speed
+
+        # Position update
+        x += speed * np.cos(angle)
+        y += speed * np.sin(angle)
+
+    def step_one(self, car, dikey, acisal):
+        """
+        ``Car.step`` for one car: advance, test the new pose, roll back on a hit.
+
+        Args:
+            car: Object with x, y, angle, speed, angular_speed and isitinwall()
+
+        Returns:
+            bool: False if the car hit a wall
+        """
+        old_x, old_y, old_angle = car.x, car.y, car.angle
+
+        car.x, car.y, car.angle, car.speed, car.angular_speed = self.advance_one(
+            car.x, car.y, car.angle, car.speed, car.angular_speed, dikey, acisal
+        )
+
+        # Collision test
+        if car.isitinwall():
+            car.x = old_x
+            car.y = old_y
+            car.angle = old_angle
+            car.speed = 0.0
+            car.angular_speed = 0.0
+            return False
+
+        return True
+
+    def step(self, cars, dikey, acisal):
+        """
+        ``step_one`` for a structure of arrays (e.g. ``CarBatch``).
+
+        Args:
+            cars: Object with x, y, angle, speed, angular_speed arrays and an
+                isitinwall() returning a boolean mask
+
+        Returns:
+            np.ndarray: Boolean mask, False where the car hit a wall
+        """
+        old_x = cars.x.copy()
+        old_y = cars.y.copy()
+        old_angle = cars.angle.copy()
+
+        self.advance(cars.x, cars.y, cars.angle, cars.speed, cars.angular_speed, dikey, acisal)
+
+        # Collision test
+        hit = cars.isitinwall()
+        if hit.any():
+            cars.x[hit] = old_x[hit]
+            cars.y[hit] = old_y[hit]
+            cars.angle[hit] = old_angle[hit]
+            cars.speed[hit] = 0.0
+            cars.angular_speed[hit] = 0.0
+
+        return ~hit
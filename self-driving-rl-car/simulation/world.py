@@ -1,29 +1,165 @@
-from PIL import Image
-import numpy as np
+import json
 import math
+import os
+import numpy as np
+
+from simulation.footprint import FootprintCollider
+
+
+# Largest offset between two points in one cell (the cell diagonal plus a margin)
+CELL_DIAGONAL = math.sqrt(2) + 1e-3
+
+# Up to this many rays a Python loop over cast_ray beats the vectorized pass
+SCALAR_RAY_LIMIT = 64
+
+# The vectorized pass hands its last few rays (those grazing walls, which take
+# the most iterations) to the scalar loop rather than iterating for them alone
+SCALAR_HANDOFF = 16
+
 
 class CollisionMap:
-    def __init__(self, image_path):
-        img = Image.open(image_path).convert("L")
-        self.map = np.array(img)
+    """
+    Wall lookups and ray casting over a map image (dark pixels are walls).
+
+    The image is decoded and thresholded once into a wall mask with a
+    one-pixel wall border, so leaving the map counts as a hit and lookups
+    only clamp their indices. With ``packed=True`` the mask is stored one bit
+    per pixel. The SDF ray engine adds a uint8 distance field of the same
+    padded shape.
+
+    ``save`` writes these arrays as .npy files into a directory; passing
+    that directory instead of an image memory-maps them read-only, so many
+    processes share one copy through the page cache and skip PIL decoding.
+    """
+
+    def __init__(self, image_path, ray_engine="sdf", sdf_radius=200, packed=False):
+        """
+        Args:
+            image_path (str): Path to map image (dark pixels are walls), or
+                to a directory written by ``save``
+            ray_engine (str): "sdf" for distance-field sphere tracing,
+                "march" for the original pixel-by-pixel walk
+            sdf_radius (int): Distance at which the distance field is clamped (max 255)
+            packed (bool): Store the wall mask bit-packed (8x smaller, for very large maps)
+        """
+        if ray_engine not in ("sdf", "march"):
+            raise ValueError(f"Unknown ray engine: {ray_engine}")
+        if not 0 < sdf_radius <= 255:
+            raise ValueError(f"sdf_radius must be in 1..255, got {sdf_radius}")
+
+        self.ray_engine = ray_engine
+        self.distance_field = None
+        self._march_field = None
+        self._footprint_colliders = {}
+
+        if os.path.isdir(image_path):
+            self._load(image_path, packed)
+        else:
+            # PIL is only imported when an image has to be decoded
+            from PIL import Image
+
+            img = Image.open(image_path).convert("L")
+            walls = np.pad(np.asarray(img) < 128, 1, constant_values=True)
+            self.packed = packed
+            self.walls = np.packbits(walls, axis=1) if packed else walls
+            self.shape = (walls.shape[0] - 2, walls.shape[1] - 2)
+
+        if ray_engine == "sdf" and self.distance_field is None:
+            self.distance_field = self._build_distance_field(sdf_radius)
+
+    def save(self, directory):
+        """
+        Write the wall mask (and distance field) as .npy files for memory mapping.
+
+        Args:
+            directory (str): Output directory (created if missing)
+        """
+        os.makedirs(directory, exist_ok=True)
+        np.save(os.path.join(directory, "walls.npy"), self.walls)
+        if self.distance_field is not None:
+            np.save(os.path.join(directory, "distance_field.npy"), self.distance_field)
+        with open(os.path.join(directory, "map.json"), "w") as f:
+            json.dump({"shape": list(self.shape), "packed": self.packed}, f)
+
+    def _load(self, directory, packed):
+        with open(os.path.join(directory, "map.json")) as f:
+            meta = json.load(f)
+
+        # Read-only mapping; .view drops np.memmap's Python-level indexing overhead
+        self.shape = tuple(meta["shape"])
+        self.packed = meta["packed"]
+        self.walls = np.load(os.path.join(directory, "walls.npy"), mmap_mode="r").view(np.ndarray)
+        if packed != self.packed:
+            walls = self.wall_mask(padded=True)
+            self.walls = np.packbits(walls, axis=1) if packed else walls
+            self.packed = packed
+
+        field_path = os.path.join(directory, "distance_field.npy")
+        if self.ray_engine == "sdf" and os.path.exists(field_path):
+            self.distance_field = np.load(field_path, mmap_mode="r").view(np.ndarray)
+
+    def wall_mask(self, padded=False):
+        """
+        Boolean wall mask (unpacked copy when stored bit-packed).
+
+        Args:
+            padded (bool): Include the one-pixel wall border
+        """
+        walls = self.walls
+        if self.packed:
+            walls = np.unpackbits(walls, axis=1, count=self.shape[1] + 2).astype(bool)
+        return walls if padded else walls[1:-1, 1:-1]
 
     def is_wall(self, x, y):
-        x = int(x)
-        y = int(y)
+        # Padded indices; everything beyond the border is a wall anyway
+        x = int(x) + 1
+        y = int(y) + 1
 
-        if x < 0 or y < 0 or y >= self.map.shape[0] or x >= self.map.shape[1]:
+        if not (0 <= x <= self.shape[1] + 1 and 0 <= y <= self.shape[0] + 1):
             return True
 
-        return self.map[y, x] < 128
+        if self.packed:
+            return bool((self.walls.item(y, x >> 3) >> (7 - (x & 7))) & 1)
+
+        return self.walls.item(y, x)
+
+
+    def walls_at(self, xs, ys):
+        """Vectorized ``is_wall`` for arrays of points; returns a boolean array."""
+        xs = np.asarray(xs, dtype=np.float64).astype(np.int64)
+        ys = np.asarray(ys, dtype=np.float64).astype(np.int64)
+
+        return self._walls_padded(np.clip(ys + 1, 0, self.shape[0] + 1),
+                                  np.clip(xs + 1, 0, self.shape[1] + 1))
+
+    def _walls_padded(self, iy, ix):
+        """Wall lookup at padded indices (already clamped)."""
+        if self.packed:
+            return ((self.walls[iy, ix >> 3] >> (7 - (ix & 7))) & 1).astype(bool)
+
+        return self.walls[iy, ix]
+
+
+    def footprint_collider(self, length, witdh, headings=72):
+        """Shared FootprintCollider for a car size (configuration-space collision maps)."""
+        key = (length, witdh, headings)
+        if key not in self._footprint_colliders:
+            self._footprint_colliders[key] = FootprintCollider(self.wall_mask(), length, witdh, headings)
+        return self._footprint_colliders[key]
 
 
     def cast_ray(self,x, y, angle, max_length=200, step=1):
+        if self.ray_engine == "sdf":
+            return self._cast_ray_sdf(x, y, angle, max_length, step)
+
+        return self._cast_ray_march(x, y, angle, max_length, step)
+
+
+    def _cast_ray_march(self, x, y, angle, max_length=200, step=1, distance=0):
 
         dx = math.cos(angle)
         dy = math.sin(angle)
 
-        distance = 0
-
         while distance < max_length:
             rx = int(x + dx * distance)
             ry = int(y + dy * distance)
@@ -34,3 +170,166 @@ class CollisionMap:
             distance += step
 
         return max_length
+
+
+    def _cast_ray_sdf(self, x, y, angle, max_length=200, step=1, distance=0):
+        """
+        Sphere tracing over the precomputed distance field.
+
+        Samples the same points as the pixel walk (multiples of ``step``),
+        but skips every sample that the distance field proves is free, so
+        the returned distance is identical to ``_cast_ray_march``.
+        ``distance`` resumes a ray that is already known to be free up to there.
+        """
+        dx = math.cos(angle)
+        dy = math.sin(angle)
+
+        field = self.distance_field
+        h, w = self.shape
+
+        while distance < max_length:
+            rx = int(x + dx * distance)
+            ry = int(y + dy * distance)
+
+            if rx < 0 or ry < 0 or ry >= h or rx >= w:
+                return distance
+
+            # The field is 0 on wall cells and the distance to the nearest wall elsewhere
+            clearance = field.item(ry + 1, rx + 1)
+            if clearance == 0:
+                return distance
+
+            skip = math.floor((clearance - CELL_DIAGONAL) / step) * step
+            distance += max(step, skip)
+
+        return max_length
+
+
+    def cast_rays(self, xs, ys, angles, max_length=200, step=1):
+        """
+        Cast many rays in one vectorized pass.
+
+        All rays are sphere traced together; rays that hit a wall or reach
+        ``max_length`` are dropped from the working set, so each iteration
+        only touches rays that are still travelling. Once only a few rays are
+        left, they are finished one by one from where they stopped, since a
+        ray grazing a wall can need many more iterations than the rest. Small
+        batches fall back to ``cast_ray``, where per-call NumPy overhead
+        would dominate.
+
+        Args:
+            xs (array-like): Ray origins x, shape (N,)
+            ys (array-like): Ray origins y, shape (N,)
+            angles (array-like): Ray angles, shape (N,) or (N, K)
+            max_length (float): Maximum ray length
+            step (float): Sampling step along the ray
+
+        Returns:
+            np.ndarray: Distances with the same shape as ``angles``
+        """
+        angles = np.asarray(angles, dtype=np.float64)
+        xs = np.asarray(xs, dtype=np.float64)
+        ys = np.asarray(ys, dtype=np.float64)
+        if angles.ndim == 2:
+            xs = xs.reshape(-1, 1)
+            ys = ys.reshape(-1, 1)
+
+        ox, oy, angles = np.broadcast_arrays(xs, ys, angles)
+        shape = angles.shape
+        ox = ox.ravel()
+        oy = oy.ravel()
+
+        if ox.size <= SCALAR_RAY_LIMIT:
+            result = [self.cast_ray(x, y, a, max_length, step)
+                      for x, y, a in zip(ox.tolist(), oy.tolist(), angles.ravel().tolist())]
+            return np.array(result, dtype=np.float64).reshape(shape)
+
+        dx = np.cos(angles).ravel()
+        dy = np.sin(angles).ravel()
+
+        field = self._clearance_field()
+        finish = self._cast_ray_sdf if field is self.distance_field else self._cast_ray_march
+        max_x = field.shape[1] - 1
+        max_y = field.shape[0] - 1
+
+        result = np.full(ox.shape, float(max_length))
+        distance = np.zeros(ox.shape)
+        active = np.arange(ox.size)
+
+        while active.size:
+            d = distance[active]
+
+            # With the padding, off-map indices land on the border wall
+            rx = np.clip((ox[active] + dx[active] * d).astype(np.int64) + 1, 0, max_x)
+            ry = np.clip((oy[active] + dy[active] * d).astype(np.int64) + 1, 0, max_y)
+            clearance = field[ry, rx]
+
+            hit = clearance == 0
+            result[active[hit]] = d[hit]
+
+            skip = np.floor((clearance - CELL_DIAGONAL) / step) * step
+            d = d + np.maximum(step, skip)
+
+            moving = ~hit & (d < max_length)
+            active = active[moving]
+            distance[active] = d[moving]
+
+            if active.size <= SCALAR_HANDOFF:
+                for i in active.tolist():
+                    result[i] = finish(ox[i], oy[i], angles.flat[i], max_length, step, distance[i])
+                break
+
+        return result.reshape(shape)
+
+
+    def _clearance_field(self):
+        """Padded field that is 0 on walls; the distance field when available."""
+        if self.distance_field is not None:
+            return self.distance_field
+
+        if self._march_field is None:
+            self._march_field = (~self.wall_mask(padded=True)).astype(np.uint8)
+
+        return self._march_field
+
+
+    def _build_distance_field(self, radius):
+        """
+        Euclidean distance transform of the wall mask, in pixels.
+
+        The map is padded with a one-pixel wall border so that leaving the
+        map counts as hitting a wall, matching ``is_wall``. Distances are
+        clamped to ``radius``; clamped values are still lower bounds, which
+        is all sphere tracing needs.
+
+        Distances are floored to whole pixels and stored as uint8: still
+        lower bounds, still 0 exactly on walls, and a quarter of the
+        float32 footprint.
+
+        Returns:
+            np.ndarray: uint8 array of shape (H + 2, W + 2)
+        """
+        walls = self.wall_mask(padded=True)
+        h, w = walls.shape
+        radius = int(radius)
+
+        # 1) Row pass: distance from each cell to the nearest wall in its row
+        cols = np.arange(w)
+        left = np.where(walls, cols, -w - radius)
+        left = np.maximum.accumulate(left, axis=1)
+        right = np.where(walls, cols, 2 * w + radius)
+        right = np.minimum.accumulate(right[:, ::-1], axis=1)[:, ::-1]
+        row_dist = np.minimum(cols - left, right - cols)
+        row_dist = np.minimum(row_dist, radius).astype(np.float32)
+
+        # 2) Column pass: d = min over dy of (row_dist[y + dy]^2 + dy^2)
+        g2 = row_dist * row_dist
+        dist2 = g2.copy()
+        for dy in range(1, min(radius, h - 1) + 1):
+            offset = np.float32(dy * dy)
+            if offset >= dist2.max():
+                break
+            np.minimum(dist2[dy:], g2[:-dy] + offset, out=dist2[dy:])
+            np.minimum(dist2[:-dy], g2[dy:] + offset, out=dist2[:-dy])
+
+        return np.floor(np.sqrt(dist2)).astype(np.uint8)
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Tests import the project's packages (simulation, ml) the way its scripts do
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,77 @@
+import os
+import threading
+
+import pytest
+import torch
+
+from ml.checkpoint_writer import CheckpointWriter, cpu_snapshot
+
+
+def test_rotation_keeps_newest(tmp_path):
+    writer = CheckpointWriter(str(tmp_path), keep_last=3)
+    for episode in range(50, 450, 50):
+        writer.submit(f"checkpoint_ep{episode}.pth", {'episode': episode}, rotate="checkpoint_ep*.pth")
+    writer.submit("final_model.pth", {'episode': 400})
+    writer.wait()
+
+    # Only the newest rotated files survive; other files are left alone
+    assert sorted(os.listdir(tmp_path)) == ["checkpoint_ep300.pth", "checkpoint_ep350.pth",
+                                            "checkpoint_ep400.pth", "final_model.pth"]
+    assert torch.load(tmp_path / "checkpoint_ep400.pth") == {'episode': 400}
+    writer.close()
+
+
+def test_keep_all(tmp_path):
+    writer = CheckpointWriter(str(tmp_path), keep_last=0)
+    for i in range(8):
+        writer.submit(f"manual_save_{i}.pth", {'i': i}, rotate="manual_save_*.pth")
+    writer.close()
+    assert len(os.listdir(tmp_path)) == 8
+
+
+def test_writes_are_atomic_and_snapshotted(tmp_path):
+    writer = CheckpointWriter(str(tmp_path))
+    weights = torch.ones(1000)
+    writer.submit("model.pth", {'weights': cpu_snapshot(weights), 'step': 1})
+    weights += 1  # training goes on after submit
+    writer.submit("model.pth", {'weights': cpu_snapshot(weights), 'step': 2})
+    writer.wait()
+
+    assert os.listdir(tmp_path) == ["model.pth"]  # no *.tmp left behind
+    state = torch.load(tmp_path / "model.pth")
+    assert state['step'] == 2
+    assert torch.equal(state['weights'], torch.full((1000,), 2.0))
+    writer.close()
+
+
+def test_jobs_run_in_order(tmp_path):
+    writer = CheckpointWriter(str(tmp_path))
+    order = []
+    release = threading.Event()
+    writer.call(release.wait)
+    for i in range(5):
+        writer.call(lambda i=i: order.append(i))
+    assert order == []  # submit and call return without waiting
+    release.set()
+    writer.wait()
+    assert order == [0, 1, 2, 3, 4]
+    writer.close()
+
+
+def test_job_error_is_raised_in_caller(tmp_path):
+    writer = CheckpointWriter(str(tmp_path))
+
+    def fail():
+        raise OSError("disk full")
+
+    writer.call(fail)
+    with pytest.raises(RuntimeError) as info:
+        writer.wait()
+    assert isinstance(info.value.__cause__, OSError)
+
+    # The thread keeps draining the queue (no hang), and later use keeps failing loudly
+    with pytest.raises(RuntimeError):
+        writer.submit("model.pth", {'step': 1})
+    with pytest.raises(RuntimeError):
+        writer.close()
+    assert not os.listdir(tmp_path)
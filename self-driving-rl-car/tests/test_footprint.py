@@ -0,0 +1,80 @@
+import math
+import os
+
+import numpy as np
+import pytest
+
+from simulation.footprint import FootprintCollider
+from simulation.world import CollisionMap
+
+
+MAP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "map.png")
+
+LENGTH, WITDH = 30, 20
+
+
+def dense_footprint_hits(walls, xs, ys, angles, spacing=0.5):
+    """Reference test: does any point of a dense grid over the car rectangle hit a wall?"""
+    h, w = walls.shape
+    along = np.linspace(-LENGTH / 2, LENGTH / 2, int(LENGTH / spacing) + 1)
+    across = np.linspace(-WITDH / 2, WITDH / 2, int(WITDH / spacing) + 1)
+    a, b = (grid.ravel() for grid in np.meshgrid(along, across))
+
+    hits = np.empty(len(xs), dtype=bool)
+    for i, (x, y, angle) in enumerate(zip(xs, ys, angles)):
+        cos_a, sin_a = math.cos(angle), math.sin(angle)
+        px = np.floor(x + a * cos_a - b * sin_a).astype(np.int64)
+        py = np.floor(y + a * sin_a + b * cos_a).astype(np.int64)
+        # Everything outside the map is a wall
+        outside = (px < 0) | (px >= w) | (py < 0) | (py >= h)
+        hits[i] = outside.any() or walls[py, px].any()
+    return hits
+
+
+def random_poses(shape, n, seed):
+    """Centres over the map (and a little beyond it), headings between the bins too."""
+    rng = np.random.default_rng(seed)
+    h, w = shape
+    return (rng.uniform(-10, w + 10, n), rng.uniform(-10, h + 10, n),
+            rng.uniform(-2 * math.pi, 2 * math.pi, n))
+
+
+def thin_walls():
+    """One-pixel walls: straight, diagonal and at a shallow angle, plus single pixels."""
+    walls = np.zeros((160, 200), dtype=bool)
+    walls[40, 20:180] = True
+    walls[60:150, 100] = True
+    for i in range(90):
+        walls[60 + i, 10 + i] = True
+        walls[150 - i // 3, 110 + i] = True
+    walls[20, 30] = walls[120, 170] = True
+    return walls
+
+
+@pytest.mark.parametrize("source", ["map", "thin"])
+def test_no_missed_collisions(source):
+    if source == "map":
+        walls = CollisionMap(MAP_PATH).wall_mask()
+    else:
+        walls = thin_walls()
+    collider = FootprintCollider(walls, LENGTH, WITDH)
+
+    xs, ys, angles = random_poses(walls.shape, 10000, seed=len(source))
+    expected = dense_footprint_hits(walls, xs, ys, angles)
+    result = collider.collides(xs, ys, angles)
+
+    # Both outcomes occur, and every real overlap is reported
+    assert 0.05 < expected.mean() < 0.95
+    assert not (expected & ~result).any()
+    # Conservative only by the rounding margin, not everywhere
+    assert (result & ~expected).mean() < 0.1
+
+
+def test_collides_one_matches_collides():
+    walls = thin_walls()
+    collider = FootprintCollider(walls, LENGTH, WITDH)
+    xs, ys, angles = random_poses(walls.shape, 2000, seed=3)
+
+    batch = collider.collides(xs, ys, angles)
+    single = [collider.collides_one(x, y, angle) for x, y, angle in zip(xs, ys, angles)]
+    np.testing.assert_array_equal(batch, single)
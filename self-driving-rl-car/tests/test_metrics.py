@@ -0,0 +1,62 @@
+import os
+
+import pytest
+
+from ml.metrics import MetricsLogger, read_metrics, trim_metrics
+
+
+def episode(i):
+    return dict(episode=i, reward=0.5 * i, steps=10 + i, epsilon=1.0 / (i + 1),
+                loss=None if i == 0 else 0.25 * i)
+
+
+def write_episodes(path, count, **options):
+    logger = MetricsLogger(path, flush_every=3, **options)
+    for i in range(count):
+        logger.log(**episode(i))
+    logger.close()
+
+
+@pytest.fixture(params=["metrics.jsonl", "metrics.csv"])
+def path(request, tmp_path):
+    return str(tmp_path / request.param)
+
+
+def test_records_round_trip(path):
+    write_episodes(path, 7)
+    assert list(read_metrics(path)) == [episode(i) for i in range(7)]
+
+    # A new logger starts the file over, an appending one continues it
+    write_episodes(path, 2)
+    assert list(read_metrics(path)) == [episode(i) for i in range(2)]
+    logger = MetricsLogger(path, append=True)
+    logger.log(**episode(2))
+    logger.close()
+    assert list(read_metrics(path)) == [episode(i) for i in range(3)]
+
+
+def test_partial_trailing_line_is_not_read(path):
+    write_episodes(path, 4)
+    with open(path, 'a') as f:
+        f.write('{"episode": 4, "rew' if path.endswith('.jsonl') else '4,2.0,1')
+
+    assert list(read_metrics(path)) == [episode(i) for i in range(4)]
+
+
+def test_trim_drops_later_episodes(path):
+    write_episodes(path, 10)
+    with open(path, 'a') as f:
+        f.write('{"episode": 10, "rew' if path.endswith('.jsonl') else '10,5.0,2')
+
+    trim_metrics(path, 5)
+
+    assert list(read_metrics(path)) == [episode(i) for i in range(6)]
+    with open(path) as f:
+        assert f.read().endswith('\n')
+    assert os.listdir(os.path.dirname(path)) == [os.path.basename(path)]
+
+    # Resumed runs append after the kept episodes
+    logger = MetricsLogger(path, append=True)
+    logger.log(**episode(6))
+    logger.close()
+    assert list(read_metrics(path)) == [episode(i) for i in range(7)]
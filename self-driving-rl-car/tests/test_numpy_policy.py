@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+import torch
+
+from ml.neural_network import QNetwork, export_npz
+from ml.numpy_policy import NumpyQNetwork
+
+
+STATE_SIZE, ACTION_SIZE = 7, 5
+
+
+@pytest.mark.parametrize("dueling", [False, True])
+@pytest.mark.parametrize("hidden_sizes", [[128, 64], [32]])
+def test_numpy_forward_matches_torch(tmp_path, dueling, hidden_sizes):
+    torch.manual_seed(0)
+    network = QNetwork(STATE_SIZE, ACTION_SIZE, hidden_sizes, dueling=dueling)
+    path = str(tmp_path / "model.npz")
+    network.export(path)
+    policy = NumpyQNetwork(path)
+    assert (policy.state_size, policy.action_size, policy.dueling) == (STATE_SIZE, ACTION_SIZE, dueling)
+
+    states = np.random.default_rng(0).normal(scale=3.0, size=(256, STATE_SIZE)).astype(np.float32)
+    with torch.no_grad():
+        expected = network(torch.from_numpy(states)).numpy()
+
+    np.testing.assert_allclose(policy(states), expected, rtol=0, atol=1e-5)
+    np.testing.assert_allclose(policy(states[3]), expected[3], rtol=0, atol=1e-5)
+    assert [policy.act(state) for state in states[:32]] == expected[:32].argmax(axis=1).tolist()
+
+
+def test_export_from_state_dict(tmp_path):
+    network = QNetwork(STATE_SIZE, ACTION_SIZE, [16, 16], dueling=True)
+    export_npz(network.state_dict(), str(tmp_path / "a.npz"))
+    network.export(str(tmp_path / "b.npz"))
+
+    states = np.random.default_rng(1).normal(size=(8, STATE_SIZE))
+    np.testing.assert_array_equal(NumpyQNetwork(str(tmp_path / "a.npz"))(states),
+                                  NumpyQNetwork(str(tmp_path / "b.npz"))(states))
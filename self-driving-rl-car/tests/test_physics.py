@@ -0,0 +1,148 @@
+import math
+import os
+
+import numpy as np
+import pytest
+
+from simulation.car import Car
+from simulation.car_batch import CarBatch
+from simulation.physics import CarPhysics
+from simulation.world import CollisionMap
+
+
+MAP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "map.png")
+
+START = (math.pi / 2, 120.0, 120.0)
+
+
+@pytest.fixture(scope="module")
+def collision_map():
+    return CollisionMap(MAP_PATH)
+
+
+def reference_step(car, dikey, acisal):
+    """``Car.step`` as it was before the physics moved into CarPhysics."""
+    old_x = car.x
+    old_y = car.y
+    old_angle = car.angle
+
+    car.speed += dikey * 0.2
+    car.speed = max(0, min(5.0, car.speed))
+
+    if abs(dikey) < 1e-3:
+        car.speed *= (1 - 0.05)
+
+    if abs(car.speed) < 0.01:
+        car.speed = 0.0
+
+    car.angular_speed += (acisal * math.radians(1.0)) / (2 * math.pi)
+
+    car.angular_speed = max(
+        -math.radians(6),
+        min(math.radians(6), car.angular_speed)
+    )
+
+    if abs(acisal) < 1e-3:
+        car.angular_speed *= (1 - 0.25)
+
+    if abs(car.angular_speed) < 0.001:
+        car.angular_speed = 0.0
+
+    car.angle += car.angular_speed
+
+    car.angle += car.angular_speed
+
+    car.x += car.speed * math.cos(car.angle)
+    car.y += car.speed * math.sin(car.angle)
+
+    if car.isitinwall():
+        car.x = old_x
+        car.y = old_y
+        car.angle = old_angle
+        car.speed = 0.0
+        car.angular_speed = 0.0
+        return False
+
+    return True
+
+
+def random_controls(ticks, num_cars, seed=0):
+    """Mostly the environment's discrete controls, with some arbitrary values mixed in."""
+    rng = np.random.default_rng(seed)
+    dikey = rng.choice([-1.0, 0.0, 1.0], size=(ticks, num_cars))
+    acisal = rng.choice([-1.0, 0.0, 1.0], size=(ticks, num_cars))
+    mixed = rng.random((ticks, num_cars)) < 0.1
+    dikey[mixed] = rng.uniform(-1, 1, mixed.sum())
+    acisal[mixed] = rng.uniform(-1, 1, mixed.sum())
+    return dikey, acisal
+
+
+def pose(car):
+    return (car.x, car.y, car.angle, car.speed, car.angular_speed)
+
+
+def test_car_step_matches_reference(collision_map):
+    car = Car(collision_map, *START)
+    reference = Car(collision_map, *START)
+    dikey, acisal = random_controls(3000, 1)
+
+    hits = 0
+    for d, a in zip(dikey[:, 0].tolist(), acisal[:, 0].tolist()):
+        ok = car.step(d, a)
+        assert ok == reference_step(reference, d, a)
+        assert pose(car) == pose(reference)
+        hits += not ok
+
+    # The comparison must also have covered rollbacks
+    assert hits > 0
+
+
+@pytest.mark.parametrize("backend", ["numpy", "numba"])
+def test_car_batch_matches_car(collision_map, backend):
+    if backend == "numba":
+        pytest.importorskip("numba")
+
+    num_cars = 32
+    physics = CarPhysics(backend=backend)
+    batch = CarBatch(collision_map, num_cars, *START, physics=physics)
+    cars = [Car(collision_map, *START) for _ in range(num_cars)]
+    dikey, acisal = random_controls(1000, num_cars, seed=1)
+
+    for d, a in zip(dikey, acisal):
+        ok = batch.step(d, a)
+        for i, car in enumerate(cars):
+            assert ok[i] == car.step(d[i], a[i])
+            assert (batch.x[i], batch.y[i], batch.angle[i], batch.speed[i],
+                    batch.angular_speed[i]) == pose(car)
+
+
+@pytest.mark.parametrize("double_turn", [True, False])
+def test_numba_kernel_matches_scalar(double_turn):
+    pytest.importorskip("numba")
+
+    num_cars = 64
+    scalar = CarPhysics(double_turn=double_turn, backend="numpy")
+    compiled = CarPhysics(double_turn=double_turn, backend="numba")
+    rng = np.random.default_rng(2)
+    state = [rng.uniform(0, 500, num_cars), rng.uniform(0, 500, num_cars),
+             rng.uniform(-math.pi, math.pi, num_cars), np.zeros(num_cars), np.zeros(num_cars)]
+    expected = [array.tolist() for array in state]
+    dikey, acisal = random_controls(200, num_cars, seed=3)
+
+    for d, a in zip(dikey, acisal):
+        compiled.advance(*state, d, a)
+        for i in range(num_cars):
+            values = scalar.advance_one(*(column[i] for column in expected), d[i], a[i])
+            for column, value in zip(expected, values):
+                column[i] = value
+
+        for array, column in zip(state, expected):
+            np.testing.assert_array_equal(array, column)
+
+
+def test_single_turn_applies_angular_speed_once():
+    physics = CarPhysics(double_turn=False)
+    x, y, angle, speed, angular_speed = physics.advance_one(0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 1.0)
+
+    assert angular_speed > 0
+    assert angle == angular_speed
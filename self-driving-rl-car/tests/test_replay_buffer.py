@@ -0,0 +1,220 @@
+import os
+
+import numpy as np
+import pytest
+
+import ml.replay_buffer
+from ml.replay_buffer import (MemmapReplayBuffer, NStepAccumulator, PrioritizedReplayBuffer,
+                              REPLAY_FIELDS, SumTree)
+
+
+STATE_SIZE = 3
+
+
+def reference_n_step(trajectories, n_step, gamma):
+    """
+    Naive n-step transitions, computed per car from its whole trajectory.
+
+    Args:
+        trajectories (dict): car -> list of (state, action, reward, next_state, done)
+
+    Returns:
+        list: (state, action, return, next_state, done, discount) tuples
+    """
+    out = []
+    for steps in trajectories.values():
+        episode_start = 0
+        for t, (state, action, *_) in enumerate(steps):
+            # Episode of step t ends at the first done at or after t
+            end = next((k for k in range(t, len(steps)) if steps[k][4]), None)
+            last = t + n_step - 1
+            if end is not None and end <= last:
+                last = end
+            elif last >= len(steps):
+                continue  # window still pending when the run stopped
+
+            ret, discount = 0.0, 1.0
+            for k in range(t, last + 1):
+                ret += discount * steps[k][2]
+                discount *= gamma
+            out.append((state, action, np.float32(ret), steps[last][3], bool(steps[last][4]),
+                        np.float32(discount)))
+    return out
+
+
+def as_rows(transitions):
+    """Order-independent view: one sortable tuple per transition."""
+    rows = [tuple(state.tolist()) + (int(action), float(ret)) + tuple(next_state.tolist()) +
+            (bool(done), float(discount))
+            for state, action, ret, next_state, done, discount in transitions]
+    return sorted(rows)
+
+
+@pytest.mark.parametrize("n_step", [1, 2, 3, 5])
+@pytest.mark.parametrize("subsets", [False, True])
+def test_n_step_matches_reference(n_step, subsets):
+    num_cars, ticks, gamma = 6, 400, 0.9
+    rng = np.random.default_rng(n_step)
+    accumulator = NStepAccumulator(num_cars, n_step, gamma, STATE_SIZE)
+
+    trajectories = {car: [] for car in range(num_cars)}
+    emitted = []
+    for t in range(ticks):
+        # All cars at once (vectorized loop) or a random subset (per-car loop)
+        cars = np.arange(num_cars)
+        if subsets:
+            cars = np.flatnonzero(rng.random(num_cars) < 0.5)
+            if cars.size == 0:
+                continue
+
+        # States encode (car, tick) so every transition is identifiable
+        states = np.stack([np.array([car, t, 0], dtype=np.float32) for car in cars])
+        next_states = states + np.float32(0.5)
+        actions = rng.integers(0, 5, cars.size)
+        rewards = rng.normal(size=cars.size)
+        dones = rng.random(cars.size) < 0.1
+
+        for i, car in enumerate(cars):
+            trajectories[car].append((states[i], actions[i], rewards[i], next_states[i], dones[i]))
+
+        out = accumulator.add(cars, states, actions, rewards, next_states, dones)
+        emitted.extend(zip(*out))
+
+    assert as_rows(emitted) == as_rows(reference_n_step(trajectories, n_step, gamma))
+
+
+def test_reset_drops_pending_windows():
+    accumulator = NStepAccumulator(2, 3, 0.9, STATE_SIZE)
+    states = np.zeros((2, STATE_SIZE), dtype=np.float32)
+    accumulator.add([0, 1], states, [0, 1], [1.0, 1.0], states, [False, False])
+
+    accumulator.reset()
+    out = accumulator.add([0, 1], states, [0, 1], [1.0, 1.0], states, [True, True])
+
+    # Only the step after the reset is emitted
+    assert len(out[0]) == 2
+    np.testing.assert_array_equal(out[5], np.float32(0.9))
+
+
+def fill(memory, count, seed=0):
+    rng = np.random.default_rng(seed)
+    states = rng.normal(size=(count, STATE_SIZE)).astype(np.float32)
+    memory.add_batch(states, rng.integers(0, 5, count), rng.normal(size=count), states + 1,
+                     rng.random(count) < 0.1)
+
+
+@pytest.mark.parametrize("capacity", [1, 5, 64, 100])
+def test_sum_tree_sums_match_leaves(capacity):
+    rng = np.random.default_rng(capacity)
+    tree = SumTree(capacity)
+    leaves = np.zeros(capacity)
+    for _ in range(50):
+        # Batches with repeated indices: the last priority given for an index wins
+        indices = rng.integers(0, capacity, rng.integers(1, 2 * capacity + 2))
+        priorities = rng.random(indices.size)
+        tree.update(indices, priorities)
+        for i, p in zip(indices, priorities):
+            leaves[i] = p
+
+        np.testing.assert_allclose(tree.get(np.arange(capacity)), leaves)
+        assert tree.total == pytest.approx(leaves.sum())
+        inner = np.arange(tree.num_leaves - 1)
+        np.testing.assert_allclose(tree.tree[inner], tree.tree[2 * inner + 1] + tree.tree[2 * inner + 2])
+
+
+def test_sum_tree_find_is_proportional_to_priority():
+    rng = np.random.default_rng(0)
+    priorities = np.array([0.0, 1.0, 2.0, 3.0, 4.0, 0.5, 0.0, 9.5])
+    tree = SumTree(priorities.size)
+    tree.update(np.arange(priorities.size), priorities)
+
+    found = tree.find(rng.random(200000) * tree.total)
+    frequencies = np.bincount(found, minlength=priorities.size) / found.size
+    np.testing.assert_allclose(frequencies, priorities / priorities.sum(), atol=0.005)
+    assert frequencies[priorities == 0].sum() == 0
+
+
+def test_importance_weights_are_normalized():
+    memory = PrioritizedReplayBuffer(100, 32, STATE_SIZE, beta=0.4)
+    fill(memory, 100)
+    rng = np.random.default_rng(1)
+    memory.update_priorities(np.arange(100), rng.exponential(size=100))
+
+    for _ in range(20):
+        for _, weights, indices in memory.sample_batches(3):
+            weights = weights.numpy().ravel()
+            assert weights.max() == pytest.approx(1.0)
+            assert (weights <= 1.0 + 1e-6).all()
+
+            # Rarely sampled (low priority) transitions get the largest weights
+            order = np.argsort(memory.tree.get(indices))
+            assert (np.diff(weights[order]) <= 1e-6).all()
+
+
+def test_update_priorities_shifts_sampling():
+    memory = PrioritizedReplayBuffer(64, 32, STATE_SIZE, alpha=1.0)
+    fill(memory, 64)
+
+    def frequency(index, draws=200):
+        hits = sum(np.count_nonzero(memory.sample()[2] == index) for _ in range(draws))
+        return hits / (draws * memory.batch_size)
+
+    # Equal priorities after adding: uniform sampling
+    assert frequency(7) == pytest.approx(1 / 64, abs=0.01)
+
+    memory.update_priorities(np.arange(64), np.full(64, 0.1))
+    memory.update_priorities(np.array([7]), np.array([6.3]))
+    assert frequency(7) == pytest.approx(6.3 / (6.3 + 63 * 0.1), abs=0.02)
+
+    memory.update_priorities(np.array([7]), np.array([0.0]))
+    assert frequency(7) < 0.001
+
+
+def test_memmap_buffer_reopens_where_it_stopped(tmp_path):
+    directory = str(tmp_path / "replay")
+    memory = MemmapReplayBuffer(directory, 50, 16, STATE_SIZE, seed=3)
+    fill(memory, 30, seed=0)
+    fill(memory, 45, seed=1)  # wraps past capacity
+    state = np.ones(STATE_SIZE, dtype=np.float32)
+    memory.add(state, 2, 0.5, state, True)
+    memory.flush()
+    expected = {name: np.array(getattr(memory, name)) for name in REPLAY_FIELDS}
+    run_id = memory.run_id
+    del memory
+
+    reopened = MemmapReplayBuffer(directory, 50, 16, STATE_SIZE, seed=3)
+    assert len(reopened) == 50
+    assert (reopened.position, reopened.added, reopened.run_id) == (26, 76, run_id)
+    for name in REPLAY_FIELDS:
+        np.testing.assert_array_equal(getattr(reopened, name), expected[name])
+
+    # Sampled rows are the stored rows
+    rng = np.random.default_rng(3)
+    idx = rng.integers(0, 50, 16)
+    reopened.rng = np.random.default_rng(3)
+    states, actions, _, next_states, _, _ = reopened.sample()
+    np.testing.assert_array_equal(states.numpy(), expected['states'][idx])
+    np.testing.assert_array_equal(actions.numpy().ravel(), expected['actions'][idx])
+    np.testing.assert_array_equal(next_states.numpy(), expected['next_states'][idx])
+
+    with pytest.raises(ValueError):
+        MemmapReplayBuffer(directory, 60, 16, STATE_SIZE)
+
+
+def test_memmap_buffer_saves_to_its_own_directory_in_place(tmp_path, monkeypatch):
+    directory = str(tmp_path / "replay")
+    memory = MemmapReplayBuffer(directory, 50, 16, STATE_SIZE)
+    fill(memory, 20)
+    files = sorted(os.listdir(directory))
+
+    # No copy: the replay files are not reopened, only flushed
+    def no_copy(*args):
+        raise AssertionError("prepare_save copied the buffer into its own directory")
+    monkeypatch.setattr(ml.replay_buffer, "open_replay_files", no_copy)
+    memory.prepare_save(os.path.join(str(tmp_path), ".", "replay"))()
+    monkeypatch.undo()
+
+    assert sorted(os.listdir(directory)) == files
+    reopened = MemmapReplayBuffer(directory, 50, 16, STATE_SIZE)
+    assert (len(reopened), reopened.position, reopened.added) == (20, 20, 20)
+    np.testing.assert_array_equal(reopened.states, memory.states)
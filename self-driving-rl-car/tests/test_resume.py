@@ -0,0 +1,166 @@
+import os
+import random
+
+import numpy as np
+import pytest
+import torch
+
+import ml.replay_buffer
+from main_train import Trainer
+from ml.replay_buffer import REPLAY_FIELDS
+
+
+MAP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "map.png")
+
+BUFFER_SIZE = 64
+
+
+def make_trainer(save_dir, **agent_options):
+    return Trainer(MAP_PATH, use_gui=False, save_dir=str(save_dir),
+                   agent_options=dict(buffer_size=BUFFER_SIZE, batch_size=8, **agent_options))
+
+
+def add_transitions(agent, count, seed):
+    rng = np.random.default_rng(seed)
+    states = rng.normal(size=(count, agent.state_size)).astype(np.float32)
+    agent.memory.add_batch(states, rng.integers(0, agent.action_size, count),
+                           rng.normal(size=count), states + 1, rng.random(count) < 0.1)
+
+
+def assert_same_replay(memory, other):
+    assert (memory.position, memory.size, memory.added, memory.run_id) == \
+        (other.position, other.size, other.added, other.run_id)
+    for name in REPLAY_FIELDS:
+        np.testing.assert_array_equal(getattr(memory, name), getattr(other, name))
+
+
+def assert_same_tensors(state, other):
+    if isinstance(state, torch.Tensor):
+        torch.testing.assert_close(state, other, rtol=0, atol=0)
+    elif isinstance(state, dict):
+        assert state.keys() == other.keys()
+        for key in state:
+            assert_same_tensors(state[key], other[key])
+    elif isinstance(state, (list, tuple)):
+        assert len(state) == len(other)
+        for value, other_value in zip(state, other):
+            assert_same_tensors(value, other_value)
+    else:
+        assert state == other
+
+
+@pytest.fixture
+def spy_writes(monkeypatch):
+    """Rows written per replay directory (by ReplayBuffer.prepare_save)."""
+    written = {}
+    open_files = ml.replay_buffer.open_replay_files
+
+    class Recorder:
+        def __init__(self, array, rows):
+            self.array = array
+            self.rows = rows
+
+        def __getitem__(self, idx):
+            return self.array[idx]
+
+        def __setitem__(self, idx, value):
+            self.rows.update(np.asarray(idx).tolist())
+            self.array[idx] = value
+
+        def flush(self):
+            self.array.flush()
+
+    def open_replay_files(directory, *args):
+        rows = written.setdefault(os.path.basename(directory), set())
+        return {name: Recorder(array, rows) for name, array in open_files(directory, *args).items()}
+
+    monkeypatch.setattr(ml.replay_buffer, "open_replay_files", open_replay_files)
+    return written
+
+
+def test_resume_restores_training_state(tmp_path):
+    trainer = make_trainer(tmp_path)
+    agent = trainer.agent
+    add_transitions(agent, BUFFER_SIZE + 10, seed=0)
+    for _ in range(3):
+        agent.learn(agent.memory.sample())
+    agent.epsilon = 0.37
+    agent.t_step = 3
+    trainer.total_episodes = 12
+
+    random.seed(1)
+    np.random.seed(1)
+    torch.manual_seed(1)
+    trainer.save_checkpoint()
+    trainer.checkpoint_writer.wait()
+    draws = (random.random(), np.random.rand(), torch.rand(1).item())
+
+    # A fresh trainer with other RNG states picks up where the saved one stopped
+    random.seed(2)
+    np.random.seed(2)
+    torch.manual_seed(2)
+    resumed = make_trainer(tmp_path)
+    assert resumed.load_checkpoint()
+
+    assert resumed.total_episodes == 12
+    assert (random.random(), np.random.rand(), torch.rand(1).item()) == draws
+    assert_same_tensors(resumed.agent.state_dict(training=True), agent.state_dict(training=True))
+    assert_same_replay(resumed.agent.memory, agent.memory)
+
+    # Sampling continues identically
+    for batch, resumed_batch in zip(agent.memory.sample(), resumed.agent.memory.sample()):
+        torch.testing.assert_close(resumed_batch, batch, rtol=0, atol=0)
+
+
+def test_incremental_save_writes_new_rows_only(tmp_path, spy_writes):
+    trainer = make_trainer(tmp_path)
+    memory = trainer.agent.memory
+    add_transitions(trainer.agent, 40, seed=0)
+    trainer.save_checkpoint()  # replay_0: everything
+    add_transitions(trainer.agent, 10, seed=1)
+    trainer.save_checkpoint()  # replay_1: everything
+    trainer.checkpoint_writer.wait()
+    spy_writes.clear()
+
+    # Transitions 40..79 are new to replay_0; the ring wraps to rows 40..63 and 0..15
+    add_transitions(trainer.agent, 30, seed=2)
+    trainer.save_checkpoint()  # replay_0 again: rows added since its last save
+    trainer.checkpoint_writer.wait()
+    assert spy_writes == {"replay_0": {i % BUFFER_SIZE for i in range(40, 80)}}
+
+    resumed = make_trainer(tmp_path)
+    assert resumed.load_checkpoint()
+    assert_same_replay(resumed.agent.memory, memory)
+
+    # After a resume the same directory pair keeps being updated incrementally
+    spy_writes.clear()
+    add_transitions(resumed.agent, 5, seed=3)
+    resumed.save_checkpoint()  # replay_1, last saved at 50 transitions
+    resumed.checkpoint_writer.wait()
+    assert spy_writes == {"replay_1": {i % BUFFER_SIZE for i in range(50, 85)}}
+
+
+def test_prioritized_resume_from_uniform_checkpoint_fails(tmp_path):
+    trainer = make_trainer(tmp_path)
+    add_transitions(trainer.agent, 20, seed=0)
+    trainer.save_checkpoint()
+    trainer.checkpoint_writer.wait()
+
+    resumed = make_trainer(tmp_path, prioritized=True)
+    with pytest.raises(ValueError, match="without prioritized replay"):
+        resumed.load_checkpoint()
+
+
+@pytest.mark.parametrize("saved, resumed, flag", [
+    ({}, {'dueling': True}, "without --dueling"),
+    ({'dueling': True}, {}, "with --dueling"),
+    ({'double_dqn': True}, {}, "with --double-dqn"),
+])
+def test_resume_with_other_network_options_fails(tmp_path, saved, resumed, flag):
+    trainer = make_trainer(tmp_path, **saved)
+    trainer.save_checkpoint()
+    trainer.checkpoint_writer.wait()
+
+    with pytest.raises(ValueError, match=flag):
+        make_trainer(tmp_path, **resumed).load_checkpoint()
+    assert make_trainer(tmp_path, **saved).load_checkpoint()
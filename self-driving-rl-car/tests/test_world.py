@@ -0,0 +1,58 @@
+import math
+import os
+
+import numpy as np
+import pytest
+
+from simulation.world import CollisionMap, SCALAR_RAY_LIMIT
+
+
+MAP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "map.png")
+
+
+@pytest.fixture(scope="module")
+def maps():
+    return {engine: CollisionMap(MAP_PATH, ray_engine=engine) for engine in ("sdf", "march")}
+
+
+def random_rays(collision_map, n, seed=0):
+    """Ray origins spread over the map (and slightly outside it) with random angles."""
+    rng = np.random.default_rng(seed)
+    h, w = collision_map.shape
+    xs = rng.uniform(-5, w + 5, n)
+    ys = rng.uniform(-5, h + 5, n)
+    angles = rng.uniform(-math.pi, math.pi, n)
+    return xs, ys, angles
+
+
+def test_sdf_matches_pixel_walk(maps):
+    xs, ys, angles = random_rays(maps["sdf"], 3000)
+    for x, y, angle in zip(xs, ys, angles):
+        for step in (1, 3):
+            assert (maps["sdf"].cast_ray(x, y, angle, step=step) ==
+                    maps["march"].cast_ray(x, y, angle, step=step))
+
+
+@pytest.mark.parametrize("engine", ["sdf", "march"])
+@pytest.mark.parametrize("num_rays", [SCALAR_RAY_LIMIT, 4 * SCALAR_RAY_LIMIT, 2000])
+def test_cast_rays_matches_cast_ray(maps, engine, num_rays):
+    collision_map = maps[engine]
+    xs, ys, angles = random_rays(collision_map, num_rays, seed=num_rays)
+
+    distances = collision_map.cast_rays(xs, ys, angles)
+    expected = [collision_map.cast_ray(x, y, a) for x, y, a in zip(xs, ys, angles)]
+
+    np.testing.assert_array_equal(distances, expected)
+
+
+def test_cast_rays_per_car_angles(maps):
+    collision_map = maps["sdf"]
+    xs, ys, headings = random_rays(collision_map, 200, seed=1)
+    angles = headings[:, None] + np.array([0.0, math.pi / 4, -math.pi / 4, math.pi / 2, -math.pi / 2])
+
+    distances = collision_map.cast_rays(xs, ys, angles)
+
+    assert distances.shape == angles.shape
+    for i in range(len(xs)):
+        np.testing.assert_array_equal(
+            distances[i], [collision_map.cast_ray(xs[i], ys[i], a) for a in angles[i]])
@@ -0,0 +1,36 @@
+import argparse
+
+from ml.metrics import read_metrics
+
+
+def main():
+    """Print the per-episode metrics of a (running) training, one line per episode."""
+    parser = argparse.ArgumentParser(description='Stream per-episode training metrics')
+    parser.add_argument('--metrics', type=str, default='models/metrics.jsonl',
+                        help='Metrics file written by main_train.py (.jsonl or .csv)')
+    parser.add_argument('--follow', action='store_true',
+                        help='Keep waiting for new episodes (like tail -f)')
+    parser.add_argument('--every', type=int, default=1, help='Print every N-th episode')
+
+    args = parser.parse_args()
+
+    try:
+        for record in read_metrics(args.metrics, follow=args.follow):
+            if record['episode'] % args.every:
+                continue
+
+            loss = record['loss']
+            steps_per_sec = record['steps_per_sec']
+            print(f"Episode {record['episode']} | "
+                  f"Reward: {record['reward']:.2f} | "
+                  f"Steps: {record['steps']} | "
+                  f"Distance: {record['distance']:.1f} | "
+                  f"Epsilon: {record['epsilon']:.3f} | "
+                  f"Loss: {'-' if loss is None else f'{loss:.4f}'} | "
+                  f"Steps/s: {'-' if steps_per_sec is None else f'{steps_per_sec:.0f}'}")
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()